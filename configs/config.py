@@ -26,6 +26,7 @@ class ConfigClass:
         self.CHANNEL_ID: Optional[int] = None
         self.CHANNEL_USERNAME: Optional[str] = None
         self.DB_PATH: str = 'catalog.db'
+        self.DB_READ_POOL_SIZE: int = 4
         self.USE_WEBHOOK: bool = False
         self.WEBHOOK_URL: Optional[str] = None
         self.ORDER_CONTACT: str = '@FLYAWAYPEP'  # Configurable order contact
@@ -85,6 +86,11 @@ class ConfigClass:
         # Load optional configurations
         self.CHANNEL_USERNAME = config('CHANNEL_USERNAME', default=None)
         self.DB_PATH = config('DB_PATH', default='catalog.db')
+        try:
+            self.DB_READ_POOL_SIZE = max(1, config('DB_READ_POOL_SIZE', default=4, cast=int))
+        except ValueError:
+            logger.warning("Invalid DB_READ_POOL_SIZE, using default of 4")
+            self.DB_READ_POOL_SIZE = 4
         self.USE_WEBHOOK = config('USE_WEBHOOK', default=False, cast=bool)
         self.WEBHOOK_URL = config('WEBHOOK_URL', default=None)
         self.ORDER_CONTACT = config('ORDER_CONTACT', default='@FLYAWAYPEP')
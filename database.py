@@ -3,14 +3,20 @@ Database models and operations for the media catalog bot.
 Uses SQLite with aiosqlite for async operations.
 """
 import aiosqlite
+import base64
+import hashlib
+import re
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Sequence, Tuple, AsyncIterator
 from collections import defaultdict
 import logging
 import asyncio
+from contextlib import asynccontextmanager
 from functools import lru_cache
 
 from configs.config import Config
+from utils.single_flight import run_once
+from utils.captions import caption_button_text
 
 logger = logging.getLogger(__name__)
 
@@ -20,8 +26,50 @@ DEFAULT_ORDER_CONTACT = '@FLYAWAYPEP'
 # In-memory caches for frequently accessed data
 _user_language_cache: Dict[int, Tuple[str, datetime]] = {}
 _order_contact_cache: Optional[Tuple[str, datetime]] = None
+_user_subscribed_cache: Dict[int, Tuple[bool, datetime]] = {}
 _cache_lock = asyncio.Lock()
 CACHE_TTL_SECONDS = 300  # 5 minutes
+SUBSCRIPTION_CACHE_TTL_SECONDS = 60
+
+# Product counts per category (None key = uncategorized), dropped on any product change
+_category_counts_cache: Optional[Tuple[Dict[Optional[str], int], datetime]] = None
+_category_counts_generation = 0
+# Subcategory counts per category, same TTL and invalidation as the category counts
+_subcategory_counts_cache: Dict[str, Tuple[List[Dict[str, Any]], datetime]] = {}
+CATEGORY_COUNTS_TTL_SECONDS = 60
+# Catalog listing pages by (category, subcategory, excluded categories, limit, offset),
+# dropped together with the counts on any product change
+_catalog_page_cache: Dict[Tuple, Tuple[List[Dict[str, Any]], datetime]] = {}
+CATALOG_PAGE_CACHE_TTL_SECONDS = 30
+CATALOG_PAGE_CACHE_MAX_SIZE = 1000
+# Full product list used by fuzzy search, dropped together with the counts on any product change
+_search_products_cache: Optional[Tuple[List[Dict[str, Any]], datetime]] = None
+SEARCH_PRODUCTS_CACHE_TTL_SECONDS = 60
+
+# Read-only connection pools (per database file) for hot read queries.
+# WAL mode lets these readers run alongside the writer without blocking.
+READ_POOL_SIZE = Config.DB_READ_POOL_SIZE
+_read_pools: Dict[str, asyncio.Queue] = {}
+_read_pool_lock = asyncio.Lock()
+
+# Write-behind buffer for pagination state (db_path -> user_id -> (state_type, query) -> (page, saved_at)).
+# Page clicks only touch this dict; flush_pagination_states() persists it in one batch.
+_pending_pagination_states: Dict[str, Dict[int, Dict[Tuple[str, str], Tuple[int, datetime]]]] = {}
+# Last search per user (db_path -> user_id -> (query, page, saved_at)), flushed together with pagination state
+_pending_last_searches: Dict[str, Dict[int, Tuple[str, int, datetime]]] = {}
+PAGINATION_FLUSH_INTERVAL_SECONDS = 2
+
+# Search queries by callback token (queries are too long for the 64-byte callback_data limit).
+_search_query_cache: Dict[str, str] = {}
+SEARCH_QUERY_CACHE_MAX_SIZE = 10000
+# Stored tokens are deleted this long after they were last written (older search buttons stop working)
+SEARCH_QUERY_TTL_DAYS = 7
+_SEARCH_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9_-]{8}")  # Shape of search_query_token output
+# Tokens this process stored, as token -> (query, written_at). Tokens are derived from the query,
+# so they're only written again once half the TTL has passed, to keep the row from expiring.
+_search_query_written: Dict[str, Tuple[str, datetime]] = {}
+# New tokens (db_path -> token -> (query, created_at)), written by flush_pagination_states()
+_pending_search_queries: Dict[str, Dict[str, Tuple[str, datetime]]] = {}
 
 
 class Database:
@@ -34,6 +82,37 @@ class Database:
         """Get a database connection context manager."""
         return aiosqlite.connect(self.db_path)
     
+    @asynccontextmanager
+    async def read_connection(self):
+        """
+        Borrow a pooled read-only connection.
+        Only use this for SELECT queries - writes must use a regular connection.
+        """
+        pool = _read_pools.get(self.db_path)
+        if pool is None:
+            async with _read_pool_lock:
+                pool = _read_pools.get(self.db_path)
+                if pool is None:
+                    pool = asyncio.Queue()
+                    try:
+                        for _ in range(READ_POOL_SIZE):
+                            conn = await aiosqlite.connect(f"file:{self.db_path}?mode=ro", uri=True)
+                            pool.put_nowait(conn)
+                    except Exception:
+                        while not pool.empty():
+                            await pool.get_nowait().close()
+                        raise
+                    _read_pools[self.db_path] = pool
+                    logger.info(f"Opened {READ_POOL_SIZE} read-only connections for {self.db_path}")
+        
+        conn = await pool.get()
+        try:
+            yield conn
+        finally:
+            # Reset per-query settings before returning the connection to the pool
+            conn.row_factory = None
+            pool.put_nowait(conn)
+    
     @staticmethod
     def normalize_bot_username(bot_username: Optional[str]) -> Optional[str]:
         """Normalize bot username to lowercase for consistent database lookups."""
@@ -84,6 +163,14 @@ class Database:
                 )
             """)
             
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS search_queries (
+                    token TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS ignored_messages (
                     message_id INTEGER NOT NULL,
@@ -250,6 +337,18 @@ class Database:
                 else:
                     logger.warning(f"Could not add 'additional_message_ids' column to products: {e}")
             
+            try:
+                await db.execute("ALTER TABLE products ADD COLUMN short_caption TEXT")
+                logger.info("Added 'short_caption' column to products table")
+            except aiosqlite.OperationalError as e:
+                if "duplicate column" in str(e).lower():
+                    logger.debug("Column 'short_caption' already exists in products table")
+                else:
+                    logger.warning(f"Could not add 'short_caption' column to products: {e}")
+            
+            # Precompute button labels for products added before short_caption existed
+            await self._migrate_short_captions(db)
+            
             # Migrate existing media groups to populate additional_message_ids
             # For media groups created before this fix, infer message IDs from sequential ordering
             logger.info("Checking for media groups needing message ID migration...")
@@ -286,6 +385,9 @@ class Database:
             await db.execute("CREATE INDEX IF NOT EXISTS idx_translation_cache_lookup ON translation_cache(source_text, source_lang, target_lang)")
             await db.execute("CREATE INDEX IF NOT EXISTS idx_translation_cache_last_used ON translation_cache(last_used DESC)")
             
+            # Search token expiry index
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_search_queries_created_at ON search_queries(created_at)")
+            
             logger.info("Database indexes created successfully")
             
             await db.commit()
@@ -353,6 +455,18 @@ class Database:
         For products created before this fix, we set bot_username to None
         which will trigger bot-specific file ID resolution on first access.
         """
+        try:
+            # Products stored before usernames were normalized - lookups compare lowercase names
+            cursor = await db.execute("""
+                UPDATE products SET bot_username = LOWER(bot_username)
+                WHERE bot_username IS NOT NULL AND bot_username != LOWER(bot_username)
+            """)
+            if cursor.rowcount:
+                await db.commit()
+                logger.info(f"Normalized bot_username for {cursor.rowcount} products")
+        except Exception as e:
+            logger.error(f"Error normalizing bot_username: {e}")
+        
         try:
             # Count products without bot_username
             cursor = await db.execute("""
@@ -372,6 +486,30 @@ class Database:
             
         except Exception as e:
             logger.error(f"Error checking bot_username migration: {e}")
+
+    
+    async def _migrate_short_captions(self, db):
+        """
+        Fill short_caption for existing products.
+        Blank captions stay NULL - their buttons are labelled by product ID.
+        """
+        try:
+            async with db.execute("SELECT id, caption FROM products WHERE short_caption IS NULL") as cursor:
+                rows = await cursor.fetchall()
+            
+            updates = []
+            for product_id, caption in rows:
+                label = caption_button_text(caption)
+                if label is not None:
+                    updates.append((label, product_id))
+            if not updates:
+                return
+            
+            await db.executemany("UPDATE products SET short_caption = ? WHERE id = ?", updates)
+            await db.commit()
+            logger.info(f"Precomputed button labels for {len(updates)} products")
+        except Exception as e:
+            logger.error(f"Error migrating short captions: {e}")
     
     async def add_product(
         self,
@@ -391,13 +529,14 @@ class Database:
         async with aiosqlite.connect(self.db_path) as db:
             try:
                 cursor = await db.execute("""
-                    INSERT INTO products (file_id, file_type, caption, message_id, chat_id, 
+                    INSERT INTO products (file_id, file_type, caption, short_caption, message_id, chat_id, 
                                         media_group_id, additional_file_ids, additional_message_ids, category, subcategory, bot_username, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (file_id, file_type, caption or "", message_id, chat_id, 
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (file_id, file_type, caption or "", caption_button_text(caption), message_id, chat_id, 
                       media_group_id, additional_file_ids, additional_message_ids, category, subcategory, 
                       self.normalize_bot_username(bot_username), datetime.now()))
                 await db.commit()
+                invalidate_category_counts_cache()
                 product_id = cursor.lastrowid
                 logger.info(f"Product added: ID={product_id}, message_id={message_id}, category={category}, bot={bot_username}")
                 return product_id
@@ -407,7 +546,7 @@ class Database:
     
     async def get_product(self, product_id: int) -> Optional[Dict[str, Any]]:
         """Get a product by ID."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.read_connection() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT * FROM products WHERE id = ?
@@ -417,6 +556,50 @@ class Database:
                     return dict(row)
                 return None
     
+    async def get_product_with_latest_state(
+        self, product_id: int, user_id: int
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Get a product and the user's most recent pagination state in one query.
+        
+        Args:
+            product_id: Product ID
+            user_id: User whose pagination state to load
+        
+        Returns:
+            Tuple of (product or None, pagination state as in get_latest_pagination_state)
+        """
+        # Unflushed state is newer than anything in the database - only the product is needed then
+        if _pending_pagination_states.get(self.db_path, {}).get(user_id):
+            return await asyncio.gather(self.get_product(product_id), self.get_latest_pagination_state(user_id))
+        
+        async with self.read_connection() as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute("""
+                SELECT p.*, s.state_type AS state_type, s.query AS state_query, s.page AS state_page
+                FROM products p
+                LEFT JOIN (
+                    SELECT state_type, query, page FROM pagination_state
+                    WHERE user_id = ?
+                    ORDER BY created_at DESC
+                    LIMIT 1
+                ) s ON 1 = 1
+                WHERE p.id = ?
+            """, (user_id, product_id)) as cursor:
+                row = await cursor.fetchone()
+        
+        if not row:
+            return None, None
+        
+        product = dict(row)
+        state_type = product.pop("state_type")
+        state = {
+            "state_type": state_type,
+            "query": product.pop("state_query"),
+            "page": product.pop("state_page")
+        }
+        return product, state if state_type is not None else None
+    
     async def get_all_products(self, limit: int = None, offset: int = 0) -> List[Dict[str, Any]]:
         """Get all products with pagination."""
         async with aiosqlite.connect(self.db_path) as db:
@@ -430,7 +613,7 @@ class Database:
     
     async def count_products(self) -> int:
         """Get total number of products."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.read_connection() as db:
             async with db.execute("SELECT COUNT(*) FROM products") as cursor:
                 row = await cursor.fetchone()
                 return row[0] if row else 0
@@ -439,6 +622,7 @@ class Database:
         """
         Count products excluding those in specified categories.
         Products with no category assigned (NULL or empty string) are included.
+        Computed from the cached per-category counts.
         
         Args:
             excluded_categories: List of category names to exclude
@@ -446,23 +630,49 @@ class Database:
         Returns:
             Count of products excluding specified categories
         """
+        counts = await self._get_category_counts_cached()
+        excluded = set(excluded_categories)
+        return sum(
+            count for category, count in counts.items()
+            if not category or category not in excluded
+        )
+    
+    async def count_products_by_category_status(self) -> Tuple[int, int]:
+        """
+        Count total and uncategorized products in a single query.
+        Products with no category assigned (NULL or empty string) count as uncategorized.
+        
+        Returns:
+            Tuple of (total_count, uncategorized_count)
+        """
         async with aiosqlite.connect(self.db_path) as db:
-            if not excluded_categories:
-                # If no categories to exclude, count all products
-                async with db.execute("SELECT COUNT(*) FROM products") as cursor:
-                    row = await cursor.fetchone()
-                    return row[0] if row else 0
-            
-            # Build placeholders for SQL query
-            placeholders = ','.join('?' * len(excluded_categories))
-            query = f"""
-                SELECT COUNT(*) FROM products 
-                WHERE (category IS NULL OR category = '') OR category NOT IN ({placeholders})
-            """
-            
-            async with db.execute(query, excluded_categories) as cursor:
+            async with db.execute("""
+                SELECT COUNT(*),
+                       COALESCE(SUM(CASE WHEN category IS NULL OR category = '' THEN 1 ELSE 0 END), 0)
+                FROM products
+            """) as cursor:
                 row = await cursor.fetchone()
-                return row[0] if row else 0
+                return (row[0], row[1]) if row else (0, 0)
+    
+    async def get_uncategorized_product_ids(self, limit: int = 10) -> List[int]:
+        """
+        Get IDs of products with no category assigned, newest first.
+        
+        Args:
+            limit: Maximum number of IDs to return
+        
+        Returns:
+            List of product IDs
+        """
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute("""
+                SELECT id FROM products
+                WHERE category IS NULL OR category = ''
+                ORDER BY created_at DESC
+                LIMIT ?
+            """, (limit,)) as cursor:
+                rows = await cursor.fetchall()
+                return [row[0] for row in rows]
     
     async def search_products(self, query: str, limit: int = None, offset: int = 0) -> List[Dict[str, Any]]:
         """Search products by caption (for fuzzy search filtering)."""
@@ -480,12 +690,39 @@ class Database:
                 return [dict(row) for row in rows]
     
     async def get_all_products_for_search(self) -> List[Dict[str, Any]]:
-        """Get all products for fuzzy search (no pagination)."""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("SELECT * FROM products ORDER BY created_at DESC") as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
+        """
+        Get all products for fuzzy search (no pagination).
+        The list is served from a short-TTL in-memory cache that is invalidated on
+        product changes, so searches and result page clicks don't reload the catalog.
+        Callers must not modify the returned list or its products.
+        
+        Returns:
+            List of product dictionaries, newest first
+        """
+        global _search_products_cache
+        
+        async with _cache_lock:
+            if _search_products_cache is not None:
+                products, cached_at = _search_products_cache
+                if datetime.now() - cached_at < timedelta(seconds=SEARCH_PRODUCTS_CACHE_TTL_SECONDS):
+                    return products
+            generation = _category_counts_generation
+        
+        async def _query():
+            async with self.read_connection() as db:
+                db.row_factory = aiosqlite.Row
+                async with db.execute("SELECT * FROM products ORDER BY created_at DESC") as cursor:
+                    rows = await cursor.fetchall()
+                    return [dict(row) for row in rows]
+        
+        products = await run_once(("search_products", self.db_path), _query)
+        
+        # Only cache if no product changed while the query was running
+        async with _cache_lock:
+            if generation == _category_counts_generation:
+                _search_products_cache = (products, datetime.now())
+        
+        return products
     
     async def get_all_products_excluding_categories(self, excluded_categories: List[str]) -> List[Dict[str, Any]]:
         """
@@ -524,6 +761,7 @@ class Database:
         async with aiosqlite.connect(self.db_path) as db:
             cursor = await db.execute("DELETE FROM products WHERE id = ?", (product_id,))
             await db.commit()
+            invalidate_category_counts_cache()
             deleted = cursor.rowcount > 0
             if deleted:
                 logger.info(f"Product deleted: ID={product_id}")
@@ -548,13 +786,78 @@ class Database:
         query: Optional[str],
         page: int
     ):
-        """Save pagination state for a user."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                INSERT OR REPLACE INTO pagination_state (user_id, state_type, query, page, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            """, (user_id, state_type, query or "", page, datetime.now()))
+        """
+        Save pagination state for a user.
+        
+        The state is buffered in memory and written to the database by
+        flush_pagination_states(), keeping the write off the render path.
+        """
+        pending = _pending_pagination_states.setdefault(self.db_path, {})
+        pending.setdefault(user_id, {})[(state_type, query or "")] = (page, datetime.now())
+    
+    async def flush_pagination_states(self) -> int:
+        """
+        Write buffered pagination states, last searches and search tokens to the database in one batch.
+        
+        Entries are only dropped from the buffer once written (and if not
+        updated again meanwhile), so reads never miss a state mid-flush.
+        
+        Returns:
+            Number of states, last searches and search tokens written
+        """
+        pending = _pending_pagination_states.get(self.db_path) or {}
+        pending_searches = _pending_last_searches.get(self.db_path) or {}
+        pending_queries = _pending_search_queries.get(self.db_path) or {}
+        if not pending and not pending_searches and not pending_queries:
+            return 0
+        
+        snapshot = [
+            (user_id, key, value)
+            for user_id, states in pending.items()
+            for key, value in states.items()
+        ]
+        search_snapshot = list(pending_searches.items())
+        query_snapshot = list(pending_queries.items())
+        async with aiosqlite.connect(self.db_path) as db:
+            if snapshot:
+                await db.executemany("""
+                    INSERT OR REPLACE INTO pagination_state (user_id, state_type, query, page, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                """, [
+                    (user_id, state_type, query, page, saved_at)
+                    for user_id, (state_type, query), (page, saved_at) in snapshot
+                ])
+            if search_snapshot:
+                await db.executemany("""
+                    INSERT OR REPLACE INTO user_last_search (user_id, query, page, updated_at)
+                    VALUES (?, ?, ?, ?)
+                """, [
+                    (user_id, query, page, saved_at)
+                    for user_id, (query, page, saved_at) in search_snapshot
+                ])
+            if query_snapshot:
+                await db.executemany("""
+                    INSERT OR REPLACE INTO search_queries (token, query, created_at)
+                    VALUES (?, ?, ?)
+                """, [
+                    (token, query, created_at)
+                    for token, (query, created_at) in query_snapshot
+                ])
             await db.commit()
+        
+        for user_id, key, value in snapshot:
+            states = pending.get(user_id)
+            if states is not None and states.get(key) is value:
+                del states[key]
+                if not states:
+                    del pending[user_id]
+        for user_id, value in search_snapshot:
+            if pending_searches.get(user_id) is value:
+                del pending_searches[user_id]
+        for token, value in query_snapshot:
+            if pending_queries.get(token) is value:
+                del pending_queries[token]
+        return len(snapshot) + len(search_snapshot) + len(query_snapshot)
     
     async def get_pagination_state(
         self,
@@ -563,6 +866,13 @@ class Database:
         query: Optional[str]
     ) -> Optional[int]:
         """Get pagination state for a user."""
+        # Unflushed state is always the newest
+        states = _pending_pagination_states.get(self.db_path, {}).get(user_id)
+        if states:
+            pending_state = states.get((state_type, query or ""))
+            if pending_state:
+                return pending_state[0]
+        
         async with aiosqlite.connect(self.db_path) as db:
             async with db.execute("""
                 SELECT page FROM pagination_state 
@@ -577,7 +887,17 @@ class Database:
         Returns:
             A dict with state_type, query, and page, or None if no state exists.
         """
-        async with aiosqlite.connect(self.db_path) as db:
+        # Unflushed state is always newer than anything in the database
+        states = _pending_pagination_states.get(self.db_path, {}).get(user_id)
+        if states:
+            (state_type, query), (page, _) = max(states.items(), key=lambda item: item[1][1])
+            return {
+                "state_type": state_type,
+                "query": query,
+                "page": page
+            }
+        
+        async with self.read_connection() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT state_type, query, page FROM pagination_state
@@ -604,16 +924,21 @@ class Database:
             await db.commit()
     
     async def save_last_search(self, user_id: int, query: str, page: int):
-        """Save user's last search query and page."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                INSERT OR REPLACE INTO user_last_search (user_id, query, page, updated_at)
-                VALUES (?, ?, ?, ?)
-            """, (user_id, query, page, datetime.now()))
-            await db.commit()
+        """
+        Save user's last search query and page.
+        
+        Like pagination state, it is buffered in memory and written to the
+        database by flush_pagination_states().
+        """
+        _pending_last_searches.setdefault(self.db_path, {})[user_id] = (query, page, datetime.now())
     
     async def get_last_search(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Get user's last search query and page."""
+        # Unflushed search is always the newest
+        pending_search = _pending_last_searches.get(self.db_path, {}).get(user_id)
+        if pending_search:
+            return {"query": pending_search[0], "page": pending_search[1]}
+        
         async with aiosqlite.connect(self.db_path) as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
@@ -624,6 +949,93 @@ class Database:
                     return {"query": row["query"], "page": row["page"]}
                 return None
     
+    @staticmethod
+    def search_query_token(query: str) -> str:
+        """Get the short callback token for a search query (8 URL-safe characters)."""
+        digest = hashlib.blake2b(query.encode(), digest_size=6).digest()
+        return base64.urlsafe_b64encode(digest).decode()
+    
+    @staticmethod
+    def is_search_token(value: str) -> bool:
+        """Check if callback data looks like a search token rather than a query from older buttons."""
+        return _SEARCH_TOKEN_PATTERN.fullmatch(value) is not None
+    
+    async def get_search_token(self, query: str) -> str:
+        """
+        Get the callback token for a search query, storing the query for get_search_query.
+        
+        New tokens are buffered in memory and written to the database by
+        flush_pagination_states(), keeping the write off the search path.
+        
+        Args:
+            query: Search query
+        
+        Returns:
+            Short token to use in callback data instead of the query
+        """
+        token = self.search_query_token(query)
+        now = datetime.now()
+        written = _search_query_written.get(token)
+        if written is not None and written[0] == query and now - written[1] < timedelta(days=SEARCH_QUERY_TTL_DAYS) / 2:
+            return token
+        
+        _pending_search_queries.setdefault(self.db_path, {})[token] = (query, now)
+        
+        if len(_search_query_written) >= SEARCH_QUERY_CACHE_MAX_SIZE:
+            _search_query_written.clear()
+        _search_query_written[token] = (query, now)
+        if len(_search_query_cache) >= SEARCH_QUERY_CACHE_MAX_SIZE:
+            _search_query_cache.clear()
+        _search_query_cache[token] = query
+        return token
+    
+    async def get_search_query(self, token: str) -> Optional[str]:
+        """
+        Get the search query behind a callback token.
+        
+        Args:
+            token: Token from get_search_token
+        
+        Returns:
+            The search query, or None if the token is unknown
+        """
+        query = _search_query_cache.get(token)
+        if query is not None:
+            return query
+        
+        # Unflushed tokens may have been dropped from the cache when it was full
+        pending_query = _pending_search_queries.get(self.db_path, {}).get(token)
+        if pending_query:
+            return pending_query[0]
+        
+        async with self.read_connection() as db:
+            async with db.execute("SELECT query FROM search_queries WHERE token = ?", (token,)) as cursor:
+                row = await cursor.fetchone()
+        if not row:
+            return None
+        
+        if len(_search_query_cache) >= SEARCH_QUERY_CACHE_MAX_SIZE:
+            _search_query_cache.clear()
+        _search_query_cache[token] = row[0]
+        return row[0]
+    
+    async def cleanup_old_search_queries(self, days: int = SEARCH_QUERY_TTL_DAYS) -> int:
+        """
+        Delete search tokens last written more than the given number of days ago.
+        Tokens still in use are rewritten by get_search_token() well before that.
+        
+        Args:
+            days: Age in days after which tokens are deleted
+        
+        Returns:
+            Number of tokens deleted
+        """
+        cutoff = datetime.now() - timedelta(days=days)
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute("DELETE FROM search_queries WHERE created_at < ?", (cutoff,))
+            await db.commit()
+            return cursor.rowcount
+    
     async def add_ignored_message(self, message_id: int, chat_id: int):
         """Add a message to the ignore list (for deleted products)."""
         async with aiosqlite.connect(self.db_path) as db:
@@ -673,6 +1085,103 @@ class Database:
                 UPDATE products SET additional_file_ids = ?, additional_message_ids = ? WHERE id = ?
             """, (additional_file_ids, additional_message_ids, product_id))
             await db.commit()
+            invalidate_category_counts_cache()
+    
+    @staticmethod
+    def _catalog_filter(
+        category: Optional[str], subcategory: Optional[str], excluded_categories: Optional[List[str]]
+    ) -> Tuple[str, List[Any]]:
+        """Build the WHERE clause and parameters for a catalog listing."""
+        if category and subcategory:
+            return "WHERE category = ? AND subcategory = ?", [category, subcategory]
+        if category:
+            return "WHERE category = ?", [category]
+        if excluded_categories:
+            placeholders = ','.join('?' * len(excluded_categories))
+            return (
+                f"WHERE (category IS NULL OR category = '') OR category NOT IN ({placeholders})",
+                list(excluded_categories)
+            )
+        return "", []
+    
+    async def count_catalog_products(
+        self,
+        category: Optional[str] = None,
+        subcategory: Optional[str] = None,
+        excluded_categories: Optional[List[str]] = None
+    ) -> int:
+        """
+        Count products in a catalog listing.
+        All counts come from the cached category / subcategory counts.
+        
+        Args:
+            category: Optional category filter
+            subcategory: Optional subcategory filter (requires category)
+            excluded_categories: Categories to exclude when no category is given
+        
+        Returns:
+            Number of matching products
+        """
+        if category and subcategory:
+            subcategory_counts = await self.get_subcategories_with_counts(category)
+            return next((item["count"] for item in subcategory_counts if item["subcategory"] == subcategory), 0)
+        if category:
+            counts = await self._get_category_counts_cached()
+            return counts.get(category, 0)
+        return await self.count_products_excluding_categories(excluded_categories or [])
+    
+    async def get_catalog_products(
+        self,
+        category: Optional[str] = None,
+        subcategory: Optional[str] = None,
+        excluded_categories: Optional[List[str]] = None,
+        limit: int = 5,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Get one page of a catalog listing, newest first.
+        Only the requested rows are fetched from the database; pages are served
+        from a short-TTL in-memory cache that is invalidated on product changes.
+        
+        Args:
+            category: Optional category filter
+            subcategory: Optional subcategory filter (requires category)
+            excluded_categories: Categories to exclude when no category is given
+            limit: Maximum number of products to return
+            offset: Number of products to skip
+        
+        Returns:
+            List of product dictionaries
+        """
+        cache_key = (category, subcategory, tuple(excluded_categories or ()) if not category else (), limit, offset)
+        async with _cache_lock:
+            cached = _catalog_page_cache.get(cache_key)
+            if cached is not None:
+                products, cached_at = cached
+                if datetime.now() - cached_at < timedelta(seconds=CATALOG_PAGE_CACHE_TTL_SECONDS):
+                    return products
+            generation = _category_counts_generation
+        
+        where_clause, params = self._catalog_filter(category, subcategory, excluded_categories)
+        query = f"SELECT * FROM products {where_clause} ORDER BY created_at DESC LIMIT ? OFFSET ?"
+        
+        async def _query():
+            async with self.read_connection() as db:
+                db.row_factory = aiosqlite.Row
+                async with db.execute(query, params + [limit, offset]) as cursor:
+                    rows = await cursor.fetchall()
+                    return [dict(row) for row in rows]
+        
+        products = await run_once(("catalog_page", self.db_path) + cache_key, _query)
+        
+        # Only cache if no product changed while the query was running
+        async with _cache_lock:
+            if generation == _category_counts_generation:
+                if len(_catalog_page_cache) >= CATALOG_PAGE_CACHE_MAX_SIZE:
+                    _catalog_page_cache.clear()
+                _catalog_page_cache[cache_key] = (products, datetime.now())
+        
+        return products
     
     async def get_products_by_category(self, category: str, limit: int = None, offset: int = 0) -> List[Dict[str, Any]]:
         """Get products filtered by category."""
@@ -692,18 +1201,46 @@ class Database:
                 row = await cursor.fetchone()
                 return row[0] if row else 0
     
-    async def get_all_category_counts(self) -> Dict[str, int]:
-        """Get product counts for all categories in a single query (optimized)."""
-        async with aiosqlite.connect(self.db_path) as db:
+    async def _query_category_counts(self) -> Dict[Optional[str], int]:
+        """Query product counts grouped by category (including uncategorized under None)."""
+        async with self.read_connection() as db:
             async with db.execute("""
                 SELECT category, COUNT(*) as count 
                 FROM products 
-                WHERE category IS NOT NULL 
                 GROUP BY category
             """) as cursor:
                 rows = await cursor.fetchall()
                 return {row[0]: row[1] for row in rows}
     
+    async def _get_category_counts_cached(self) -> Dict[Optional[str], int]:
+        """
+        Get product counts grouped by category (including uncategorized under None).
+        Served from a short-TTL in-memory cache that is invalidated on product changes.
+        """
+        global _category_counts_cache
+        
+        async with _cache_lock:
+            if _category_counts_cache is not None:
+                counts, cached_at = _category_counts_cache
+                if datetime.now() - cached_at < timedelta(seconds=CATEGORY_COUNTS_TTL_SECONDS):
+                    return counts
+            generation = _category_counts_generation
+        
+        # Concurrent cache misses share a single query
+        counts = await run_once(("category_counts", self.db_path), self._query_category_counts)
+        
+        # Only cache if no product changed while the query was running
+        async with _cache_lock:
+            if generation == _category_counts_generation:
+                _category_counts_cache = (counts, datetime.now())
+        
+        return counts
+    
+    async def get_all_category_counts(self) -> Dict[str, int]:
+        """Get product counts for all categories in a single query (cached)."""
+        counts = await self._get_category_counts_cached()
+        return {category: count for category, count in counts.items() if category is not None}
+    
     async def get_all_categories(self) -> List[str]:
         """Get list of all unique categories."""
         async with aiosqlite.connect(self.db_path) as db:
@@ -739,17 +1276,42 @@ class Database:
                 return row[0] if row else 0
     
     async def get_subcategories_with_counts(self, category: str) -> List[Dict[str, Any]]:
-        """Get subcategories for a category with product counts."""
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute("""
-                SELECT subcategory, COUNT(*) as count
-                FROM products
-                WHERE category = ? AND subcategory IS NOT NULL
-                GROUP BY subcategory
-                ORDER BY subcategory
-            """, (category,)) as cursor:
-                rows = await cursor.fetchall()
-                return [{"subcategory": row[0], "count": row[1]} for row in rows]
+        """
+        Get subcategories for a category with product counts.
+        Served from a short-TTL in-memory cache that is invalidated on product changes;
+        concurrent cache misses share one query.
+        
+        Products without a subcategory are included with subcategory None,
+        so the counts always sum to the category total.
+        """
+        async with _cache_lock:
+            cached = _subcategory_counts_cache.get(category)
+            if cached is not None:
+                counts, cached_at = cached
+                if datetime.now() - cached_at < timedelta(seconds=CATEGORY_COUNTS_TTL_SECONDS):
+                    return counts
+            generation = _category_counts_generation
+        
+        async def _query():
+            async with self.read_connection() as db:
+                async with db.execute("""
+                    SELECT subcategory, COUNT(*) as count
+                    FROM products
+                    WHERE category = ?
+                    GROUP BY subcategory
+                    ORDER BY subcategory
+                """, (category,)) as cursor:
+                    rows = await cursor.fetchall()
+                    return [{"subcategory": row[0], "count": row[1]} for row in rows]
+        
+        counts = await run_once(("subcategory_counts", self.db_path, category), _query)
+        
+        # Only cache if no product changed while the query was running
+        async with _cache_lock:
+            if generation == _category_counts_generation:
+                _subcategory_counts_cache[category] = (counts, datetime.now())
+        
+        return counts
     
     async def update_product_category(self, product_id: int, category: str, subcategory: Optional[str] = None):
         """Update a product's category and subcategory."""
@@ -758,6 +1320,7 @@ class Database:
                 UPDATE products SET category = ?, subcategory = ? WHERE id = ?
             """, (category, subcategory, product_id))
             await db.commit()
+            invalidate_category_counts_cache()
             
             # Remove from pending categorization if it exists
             await db.execute("""
@@ -793,7 +1356,7 @@ class Database:
     
     async def track_user(self, user_id: int, username: Optional[str] = None, 
                         first_name: Optional[str] = None, last_name: Optional[str] = None,
-                        bot_username: Optional[str] = None):
+                        bot_username: Optional[str] = None) -> bool:
         """
         Track or update a bot user.
         
@@ -801,6 +1364,9 @@ class Database:
         - On first interaction: bot_username is recorded
         - On subsequent interactions: bot_username is preserved (not overwritten)
         - This ensures analytics show which bot the user first interacted with
+        
+        Returns:
+            True if the user was new (inserted), False if an existing user was updated
         """
         async with aiosqlite.connect(self.db_path) as db:
             # Check if user exists
@@ -824,10 +1390,12 @@ class Database:
                 """, (user_id, username, first_name, last_name, datetime.now(), datetime.now(), bot_username))
             
             await db.commit()
+        
+        return exists is None
     
     async def get_all_users(self) -> List[Dict[str, Any]]:
         """Get all bot users."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.read_connection() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT * FROM bot_users ORDER BY last_seen DESC
@@ -835,6 +1403,26 @@ class Database:
                 rows = await cursor.fetchall()
                 return [dict(row) for row in rows]
     
+    async def iter_user_batches(self, batch_size: int = 500) -> AsyncIterator[List[Tuple[int, int]]]:
+        """
+        Stream all bot users in fixed-size batches instead of loading the whole table.
+        
+        Args:
+            batch_size: Number of rows fetched per batch
+        
+        Yields:
+            Lists of (user_id, is_blocked) tuples
+        """
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute("""
+                SELECT user_id, COALESCE(is_blocked, 0) FROM bot_users ORDER BY last_seen DESC
+            """) as cursor:
+                while True:
+                    rows = await cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield [(row[0], row[1]) for row in rows]
+    
     async def get_users_paginated(self, limit: int = 10, offset: int = 0) -> tuple[int, List[Dict[str, Any]]]:
         """
         Get paginated list of bot users with total count.
@@ -886,22 +1474,41 @@ class Database:
                 return row is not None
     
     async def set_user_notifications(self, user_id: int, enabled: bool):
-        """Enable or disable notifications for a user."""
+        """Enable or disable notifications for a user and invalidate cache."""
         async with aiosqlite.connect(self.db_path) as db:
             await db.execute("""
                 UPDATE bot_users SET notifications_enabled = ? WHERE user_id = ?
             """, (1 if enabled else 0, user_id))
             await db.commit()
+        
+        # Invalidate cache for this user
+        async with _cache_lock:
+            _user_subscribed_cache.pop(user_id, None)
     
     async def is_user_subscribed(self, user_id: int) -> bool:
-        """Check if user has notifications enabled."""
-        async with aiosqlite.connect(self.db_path) as db:
+        """Check if user has notifications enabled (with caching)."""
+        # Check cache first
+        async with _cache_lock:
+            if user_id in _user_subscribed_cache:
+                subscribed, cached_at = _user_subscribed_cache[user_id]
+                # Return cached value if not expired
+                if datetime.now() - cached_at < timedelta(seconds=SUBSCRIPTION_CACHE_TTL_SECONDS):
+                    return subscribed
+        
+        # Cache miss or expired - query database
+        async with self.read_connection() as db:
             async with db.execute("""
                 SELECT notifications_enabled FROM bot_users WHERE user_id = ?
             """, (user_id,)) as cursor:
                 row = await cursor.fetchone()
                 # Default to True if user not found
-                return row[0] == 1 if row else True
+                subscribed = row[0] == 1 if row else True
+        
+        # Update cache
+        async with _cache_lock:
+            _user_subscribed_cache[user_id] = (subscribed, datetime.now())
+        
+        return subscribed
     
     async def get_subscribed_users(self) -> List[int]:
         """Get list of user IDs with notifications enabled (excluding admins)."""
@@ -1031,13 +1638,19 @@ class Database:
                 row = await cursor.fetchone()
                 return row[0] if row else 0
     
-    async def block_user(self, user_id: int):
-        """Block a user from using the bot."""
+    async def block_user(self, user_id: int) -> bool:
+        """
+        Block a user from using the bot.
+        
+        Returns:
+            True if the user was found and blocked, False if no such user exists
+        """
         async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
+            cursor = await db.execute("""
                 UPDATE bot_users SET is_blocked = 1 WHERE user_id = ?
             """, (user_id,))
             await db.commit()
+            return cursor.rowcount > 0
     
     async def unblock_user(self, user_id: int):
         """Unblock a user."""
@@ -1049,7 +1662,7 @@ class Database:
     
     async def is_user_blocked(self, user_id: int) -> bool:
         """Check if a user is blocked."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.read_connection() as db:
             async with db.execute("""
                 SELECT is_blocked FROM bot_users WHERE user_id = ?
             """, (user_id,)) as cursor:
@@ -1070,6 +1683,11 @@ class Database:
             # Delete any custom message queue entries
             await db.execute("DELETE FROM custom_message_queue WHERE user_id = ?", (user_id,))
             await db.commit()
+        
+        # Drop cached per-user state
+        async with _cache_lock:
+            _user_subscribed_cache.pop(user_id, None)
+            _user_language_cache.pop(user_id, None)
     
     async def delete_users_by_bot(self, bot_username: str):
         """
@@ -1103,6 +1721,12 @@ class Database:
                 else:
                     await db.execute("DELETE FROM bot_users WHERE LOWER(bot_username) = LOWER(?)", (bot_username,))
                 await db.commit()
+                
+                # Drop cached per-user state
+                async with _cache_lock:
+                    for user_id in user_ids:
+                        _user_subscribed_cache.pop(user_id, None)
+                        _user_language_cache.pop(user_id, None)
             
             return len(user_ids)
     
@@ -1203,6 +1827,18 @@ class Database:
             """, (user_id, message_text, datetime.now()))
             await db.commit()
     
+    async def queue_custom_messages(self, user_ids: List[int], message_text: str):
+        """Queue the same custom message for several users in one transaction."""
+        if not user_ids:
+            return
+        now = datetime.now()
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany("""
+                INSERT INTO custom_message_queue (user_id, message_text, created_at)
+                VALUES (?, ?, ?)
+            """, [(user_id, message_text, now) for user_id in user_ids])
+            await db.commit()
+    
     async def get_pending_custom_messages(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get pending custom messages from queue."""
         async with aiosqlite.connect(self.db_path) as db:
@@ -1246,23 +1882,30 @@ class Database:
                 # Return cached value if not expired
                 if datetime.now() - cached_at < timedelta(seconds=CACHE_TTL_SECONDS):
                     return lang
+        queried_at = datetime.now()
         
-        # Cache miss or expired - query database
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute("""
-                SELECT language FROM bot_users WHERE user_id = ?
-            """, (user_id,)) as cursor:
-                row = await cursor.fetchone()
-                lang = row[0] if row else 'en'
+        # Cache miss or expired - query database (concurrent misses share one query)
+        async def _query():
+            async with self.read_connection() as db:
+                async with db.execute("""
+                    SELECT language FROM bot_users WHERE user_id = ?
+                """, (user_id,)) as cursor:
+                    row = await cursor.fetchone()
+                    return row[0] if row else 'en'
         
-        # Update cache
+        lang = await run_once(("user_language", self.db_path, user_id), _query)
+        
+        # Update cache, unless set_user_language() wrote a newer value while the query was running
         async with _cache_lock:
+            cached = _user_language_cache.get(user_id)
+            if cached is not None and cached[1] > queried_at:
+                return cached[0]
             _user_language_cache[user_id] = (lang, datetime.now())
         
         return lang
     
     async def set_user_language(self, user_id: int, language: str):
-        """Set user's preferred language and invalidate cache."""
+        """Set user's preferred language and write it through to the cache."""
         global _user_language_cache
         
         async with aiosqlite.connect(self.db_path) as db:
@@ -1284,7 +1927,7 @@ class Database:
             
             await db.commit()
         
-        # Invalidate cache for this user
+        # Write through so the next lookup needs no query
         async with _cache_lock:
             _user_language_cache[user_id] = (language, datetime.now())
     
@@ -1384,13 +2027,16 @@ class Database:
                 if datetime.now() - cached_at < timedelta(seconds=CACHE_TTL_SECONDS):
                     return contact
         
-        # Cache miss or expired - query database
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute("""
-                SELECT value FROM bot_settings WHERE key = 'order_contact'
-            """) as cursor:
-                row = await cursor.fetchone()
-                contact = row[0] if row else DEFAULT_ORDER_CONTACT
+        # Cache miss or expired - query database (concurrent misses share one query)
+        async def _query():
+            async with self.read_connection() as db:
+                async with db.execute("""
+                    SELECT value FROM bot_settings WHERE key = 'order_contact'
+                """) as cursor:
+                    row = await cursor.fetchone()
+                    return row[0] if row else DEFAULT_ORDER_CONTACT
+        
+        contact = await run_once(("order_contact", self.db_path), _query)
         
         # Update cache
         async with _cache_lock:
@@ -1441,6 +2087,54 @@ class Database:
                     return row[0]
                 return None
     
+    async def get_bot_file_ids(
+        self,
+        source_chat_id: int,
+        source_message_ids: Sequence[int],
+        bot_username: str
+    ) -> Dict[int, str]:
+        """
+        Get cached bot-specific file IDs for all files of a media group in one query.
+        
+        Args:
+            source_chat_id: ID of the source chat
+            source_message_ids: Source message ID per file (list index = file index)
+            bot_username: Bot the file IDs belong to
+        
+        Returns:
+            Mapping of file index -> cached file ID (missing indexes aren't cached yet)
+        """
+        if not source_message_ids:
+            return {}
+        
+        placeholders = ",".join("?" * len(source_message_ids))
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(f"""
+                SELECT id, source_message_id, file_index, file_id FROM bot_file_id_cache
+                WHERE source_chat_id = ? AND bot_username = ?
+                  AND source_message_id IN ({placeholders})
+            """, [source_chat_id, bot_username.lower()] + list(source_message_ids)) as cursor:
+                rows = await cursor.fetchall()
+            
+            file_ids = {}
+            used_ids = []
+            for row_id, source_message_id, file_index, file_id in rows:
+                # Only rows whose message matches the file at that index
+                if 0 <= file_index < len(source_message_ids) and source_message_ids[file_index] == source_message_id:
+                    file_ids[file_index] = file_id
+                    used_ids.append(row_id)
+            
+            if used_ids:
+                # Update usage stats
+                await db.execute(f"""
+                    UPDATE bot_file_id_cache
+                    SET last_used = ?, use_count = use_count + 1
+                    WHERE id IN ({",".join("?" * len(used_ids))})
+                """, [datetime.now()] + used_ids)
+                await db.commit()
+            
+            return file_ids
+    
     async def cache_bot_file_id(
         self,
         source_chat_id: int,
@@ -1643,6 +2337,13 @@ class Database:
                     stats['products'] = cursor.rowcount
                 
                 await db.commit()
+                invalidate_category_counts_cache()
+                
+                # Drop cached per-user state
+                async with _cache_lock:
+                    for user_id in user_ids:
+                        _user_subscribed_cache.pop(user_id, None)
+                        _user_language_cache.pop(user_id, None)
                 
             logger.info(f"Pruned: {stats['users']} users, {stats['products']} products, "
                        f"{stats['notifications']} notifications, {stats['custom_messages']} custom messages "
@@ -1651,17 +2352,81 @@ class Database:
         return stats
 
 
+_db: Optional[Database] = None
+
+
+def get_db() -> Database:
+    """
+    Get the shared Database instance for the configured DB_PATH.
+    
+    Handlers should use this rather than constructing their own Database,
+    so every module works against the same instance.
+    """
+    global _db
+    if _db is None:
+        _db = Database()
+    return _db
+
+
+def invalidate_category_counts_cache():
+    """Drop cached per-category product counts, catalog pages and the search product list. Call after adding, deleting or changing products."""
+    global _category_counts_cache, _search_products_cache, _category_counts_generation
+    _category_counts_cache = None
+    _search_products_cache = None
+    _subcategory_counts_cache.clear()
+    _catalog_page_cache.clear()
+    _category_counts_generation += 1
+
+
+async def close_read_connections():
+    """Close all pooled read-only connections. Call on application shutdown."""
+    async with _read_pool_lock:
+        for db_path, pool in list(_read_pools.items()):
+            while not pool.empty():
+                conn = pool.get_nowait()
+                try:
+                    await conn.close()
+                except Exception as e:
+                    logger.error(f"Error closing read connection for {db_path}: {e}")
+        _read_pools.clear()
+
+
 async def clear_database_caches():
     """Clear all in-memory database caches. Useful for testing or after bulk updates."""
     global _user_language_cache, _order_contact_cache
     
     async with _cache_lock:
         _user_language_cache.clear()
+        _user_subscribed_cache.clear()
         _order_contact_cache = None
+    invalidate_category_counts_cache()
     
     logger.info("Database caches cleared")
 
 
+async def prune_expired_caches() -> int:
+    """
+    Drop expired per-user cache entries so the caches don't grow with every user ever seen.
+    
+    Returns:
+        Number of entries removed
+    """
+    now = datetime.now()
+    language_cutoff = now - timedelta(seconds=CACHE_TTL_SECONDS)
+    subscribed_cutoff = now - timedelta(seconds=SUBSCRIPTION_CACHE_TTL_SECONDS)
+    
+    async with _cache_lock:
+        expired_languages = [uid for uid, (_, cached_at) in _user_language_cache.items() if cached_at < language_cutoff]
+        for user_id in expired_languages:
+            del _user_language_cache[user_id]
+        
+        expired_subscriptions = [uid for uid, (_, cached_at) in _user_subscribed_cache.items() if cached_at < subscribed_cutoff]
+        for user_id in expired_subscriptions:
+            del _user_subscribed_cache[user_id]
+    
+    return len(expired_languages) + len(expired_subscriptions)
+
+
 
     
 
@@ -8,11 +8,26 @@ from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from telegram.error import BadRequest
-from database import Database
-from utils.helpers import is_admin, get_channel_id, get_channel_username, escape_markdown_v1
+from database import get_db
+from utils.helpers import is_admin, admin_only, parse_user_id, get_channel_id, get_channel_username, escape_markdown_v1, clear_file_id_cache
+from utils.notifications import notify_admins_for_categorization
+from utils.reply import is_media_message
 
 logger = logging.getLogger(__name__)
-db = Database()
+db = get_db()
+
+# /nuke first-confirmation message and keyboard (static apart from the count)
+_NUKE_WARN_TMPL = (
+    "⚠️ **NUKE WARNING**\n\n"
+    "You are about to delete **{count}** product(s) from the catalog.\n\n"
+    "This action cannot be undone!\n\n"
+    "Are you sure you want to continue?"
+)
+_NUKE_WARN_TMPL_NO_MD = _NUKE_WARN_TMPL.replace("**", "")
+_NUKE_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("⚠️ Yes, I want to nuke", callback_data="nuke_confirm1")],
+    [InlineKeyboardButton("❌ Cancel", callback_data="nuke_cancel")]
+])
 
 
 async def build_users_bot_selection_menu():
@@ -115,54 +130,29 @@ async def build_users_bot_selection_menu():
     return keyboard, message, message_no_md, True, all_bots
 
 
+@admin_only
 async def nuke_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /nuke command - deletes ALL products (admin only) with double confirmation."""
-    user_id = update.effective_user.id
-    
-    if not is_admin(user_id):
-        await update.message.reply_text(
-            "❌ This command is only available for administrators."
-        )
-        return
-    
-    # First confirmation
-    keyboard = InlineKeyboardMarkup([
-        [InlineKeyboardButton("⚠️ Yes, I want to nuke", callback_data="nuke_confirm1")],
-        [InlineKeyboardButton("❌ Cancel", callback_data="nuke_cancel")]
-    ])
-    
     total_count = await db.count_products()
     
+    # First confirmation
     try:
         await update.message.reply_text(
-            f"⚠️ **NUKE WARNING**\n\n"
-            f"You are about to delete **{total_count}** product(s) from the catalog.\n\n"
-            f"This action cannot be undone!\n\n"
-            f"Are you sure you want to continue?",
-            reply_markup=keyboard,
+            _NUKE_WARN_TMPL.format(count=total_count),
+            reply_markup=_NUKE_KB,
             parse_mode="Markdown"
         )
     except BadRequest as e:
         logger.warning(f"Markdown parse error in nuke_command, retrying without parse_mode: {e}")
         await update.message.reply_text(
-            f"⚠️ NUKE WARNING\n\n"
-            f"You are about to delete {total_count} product(s) from the catalog.\n\n"
-            f"This action cannot be undone!\n\n"
-            f"Are you sure you want to continue?",
-            reply_markup=keyboard
+            _NUKE_WARN_TMPL_NO_MD.format(count=total_count),
+            reply_markup=_NUKE_KB
         )
 
 
+@admin_only
 async def users_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /users command - view bot users grouped by bot instance with notification controls (admin only)."""
-    user_id = update.effective_user.id
-    
-    if not is_admin(user_id):
-        await update.message.reply_text(
-            "❌ This command is only available for administrators."
-        )
-        return
-    
     try:
         # Build bot selection menu
         keyboard, message, message_no_md, has_bots, bot_list = await build_users_bot_selection_menu()
@@ -295,10 +285,15 @@ async def show_users_page(update: Update, context: ContextTypes.DEFAULT_TYPE, pa
         
         message_text = "\n".join(message_lines)
         
+        # Create callback data suffix that includes bot_username if specified
+        # (shared by every button on the page, so build it once)
+        bot_param = "|" + bot_username if bot_username else ""
+        page_suffix = "|" + str(page) + bot_param
+        
         # Build keyboard with individual toggle buttons
         keyboard_buttons = []
         for user in page_users:
-            uid = user['user_id']
+            uid_str = str(user['user_id'])
             notif_enabled = user.get('notifications_enabled', 1) == 1
             is_blocked = user.get('is_blocked', 0) == 1
             
@@ -307,25 +302,22 @@ async def show_users_page(update: Update, context: ContextTypes.DEFAULT_TYPE, pa
             if len(username) > 12:
                 username = username[:9] + "..."
             
-            # Create callback data that includes bot_username if specified
-            bot_param = f"|{bot_username}" if bot_username else ""
-            
             # Create row with notification toggle and block/unblock button
             row_buttons = [
                 InlineKeyboardButton(
                     f"{'🔕' if notif_enabled else '🔔'} {username}",
-                    callback_data=f"toggle_notif|{uid}|{page}{bot_param}"
+                    callback_data="toggle_notif|" + uid_str + page_suffix
                 )
             ]
             
             # Add block/unblock button
             if is_blocked:
                 row_buttons.append(
-                    InlineKeyboardButton("✅ Unblock", callback_data=f"unblock_user|{uid}|{page}{bot_param}")
+                    InlineKeyboardButton("✅ Unblock", callback_data="unblock_user|" + uid_str + page_suffix)
                 )
             else:
                 row_buttons.append(
-                    InlineKeyboardButton("🚫 Block", callback_data=f"block_user|{uid}|{page}{bot_param}")
+                    InlineKeyboardButton("🚫 Block", callback_data="block_user|" + uid_str + page_suffix)
                 )
             
             keyboard_buttons.append(row_buttons)
@@ -333,10 +325,10 @@ async def show_users_page(update: Update, context: ContextTypes.DEFAULT_TYPE, pa
         # Add pagination buttons
         nav_buttons = []
         if page > 1:
-            prev_callback = f"users_page|{page-1}{bot_param}" if bot_username else f"users_page|{page-1}"
+            prev_callback = f"users_page|{page-1}{bot_param}"
             nav_buttons.append(InlineKeyboardButton("⬅️ Previous", callback_data=prev_callback))
         if page < total_pages:
-            next_callback = f"users_page|{page+1}{bot_param}" if bot_username else f"users_page|{page+1}"
+            next_callback = f"users_page|{page+1}{bot_param}"
             nav_buttons.append(InlineKeyboardButton("➡️ Next", callback_data=next_callback))
         
         if nav_buttons:
@@ -399,8 +391,11 @@ async def delete_product(update: Update, context: ContextTypes.DEFAULT_TYPE, pro
         return
     
     try:
-        # Get product info before deletion
-        product = await db.get_product(product_id)
+        # Get product info before deletion, along with user's previous page to return to
+        product, catalog_page = await asyncio.gather(
+            db.get_product(product_id),
+            db.get_pagination_state(user_id, "catalog", None)
+        )
         
         if not product:
             await update.callback_query.answer(
@@ -413,32 +408,38 @@ async def delete_product(update: Update, context: ContextTypes.DEFAULT_TYPE, pro
         deleted = await db.delete_product(product_id)
         
         if deleted:
-            # Get user's previous page to return to
-            catalog_page = await db.get_pagination_state(user_id, "catalog", None)
             back_page = catalog_page or 1
             
-            # Check if the message is a media message (can't edit media messages)
+            reply_markup = InlineKeyboardMarkup([
+                [InlineKeyboardButton("🔙 Back to catalog", callback_data=f"menu|{back_page}")]
+            ])
+            
+            # Check if the message is a media message (can't edit text of media messages)
             message = update.callback_query.message
-            if message.photo or message.video or message.document or message.animation or message.audio:
-                # Delete the media message and send a new text message
+            if is_media_message(message):
+                # Replace the caption in place (single request)
                 try:
-                    await message.delete()
-                except Exception:
-                    pass  # If deletion fails, continue anyway
-                await context.bot.send_message(
-                    chat_id=update.effective_chat.id,
-                    text="✅ Product deleted successfully!",
-                    reply_markup=InlineKeyboardMarkup([
-                        [InlineKeyboardButton("🔙 Back to catalog", callback_data=f"menu|{back_page}")]
-                    ])
-                )
+                    await update.callback_query.edit_message_caption(
+                        caption="✅ Product deleted successfully!",
+                        reply_markup=reply_markup
+                    )
+                except BadRequest as e:
+                    # Caption can't be edited - delete the media message and send a new text message
+                    logger.warning(f"Caption edit failed in delete_product, falling back to delete+send: {e}")
+                    try:
+                        await message.delete()
+                    except Exception:
+                        pass  # If deletion fails, continue anyway
+                    await context.bot.send_message(
+                        chat_id=update.effective_chat.id,
+                        text="✅ Product deleted successfully!",
+                        reply_markup=reply_markup
+                    )
             else:
                 # Regular text message, can be edited
                 await update.callback_query.edit_message_text(
                     "✅ Product deleted successfully!",
-                    reply_markup=InlineKeyboardMarkup([
-                        [InlineKeyboardButton("🔙 Back to catalog", callback_data=f"menu|{back_page}")]
-                    ])
+                    reply_markup=reply_markup
                 )
             logger.info(f"Admin {user_id} deleted product {product_id}")
         else:
@@ -455,16 +456,11 @@ async def delete_product(update: Update, context: ContextTypes.DEFAULT_TYPE, pro
         )
 
 
+@admin_only
 async def recategorize_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /recategorize command - send categorization notifications for uncategorized products (admin only)."""
     user_id = update.effective_user.id
     
-    if not is_admin(user_id):
-        await update.message.reply_text(
-            "❌ This command is only available for administrators."
-        )
-        return
-    
     try:
         # Send initial message
         status_msg = await update.message.reply_text(
@@ -472,46 +468,45 @@ async def recategorize_command(update: Update, context: ContextTypes.DEFAULT_TYP
             "This may take a moment."
         )
         
-        # Get all products
-        all_products = await db.get_all_products_for_search()
+        # Count products without transferring rows
+        total_count, uncategorized_count = await db.count_products_by_category_status()
         
-        if not all_products:
+        if not total_count:
             await status_msg.edit_text("📭 No products found.")
             return
         
-        # Find uncategorized products
-        uncategorized = [p for p in all_products if not p.get("category")]
-        
-        if not uncategorized:
+        if not uncategorized_count:
             await status_msg.edit_text(
-                f"✅ All {len(all_products)} products are already categorized!"
+                f"✅ All {total_count} products are already categorized!"
             )
             return
         
-        # Send categorization notifications for uncategorized products
-        # Import the notification function
-        from main import notify_admins_for_categorization
+        # Only fetch the IDs we will actually notify for
+        uncategorized_ids = await db.get_uncategorized_product_ids(limit=10)  # Limit to 10 at a time to avoid spam
         
+        # Send categorization notifications for uncategorized products one at a time -
+        # they all go to the same admin chats, and no outbound rate limiter is configured,
+        # so the delay keeps us under Telegram's per-chat limits
         notified = 0
-        for product in uncategorized[:10]:  # Limit to 10 at a time to avoid spam
+        for product_id in uncategorized_ids:
             try:
-                await notify_admins_for_categorization(context, product["id"])
+                await notify_admins_for_categorization(context, product_id)
                 notified += 1
                 await asyncio.sleep(0.5)  # Small delay between notifications
             except Exception as e:
-                logger.error(f"Failed to notify for product {product['id']}: {e}")
+                logger.error(f"Failed to notify for product {product_id}: {e}")
         
         # Send completion message
-        categorized_count = len(all_products) - len(uncategorized)
+        categorized_count = total_count - uncategorized_count
         text = (
             f"📊 **Categorization Status**\n\n"
-            f"📦 Total products: {len(all_products)}\n"
+            f"📦 Total products: {total_count}\n"
             f"✅ Categorized: {categorized_count}\n"
-            f"❓ Uncategorized: {len(uncategorized)}\n"
+            f"❓ Uncategorized: {uncategorized_count}\n"
             f"📤 Notifications sent: {notified}"
         )
         
-        if len(uncategorized) > 10:
+        if uncategorized_count > 10:
             text += f"\n\n⚠️ Only sent notifications for first 10 uncategorized products.\nRun command again to process more."
         
         try:
@@ -520,12 +515,12 @@ async def recategorize_command(update: Update, context: ContextTypes.DEFAULT_TYP
             logger.warning(f"Markdown parse error in recategorize_command, retrying without parse_mode: {e}")
             text_no_md = (
                 f"📊 Categorization Status\n\n"
-                f"📦 Total products: {len(all_products)}\n"
+                f"📦 Total products: {total_count}\n"
                 f"✅ Categorized: {categorized_count}\n"
-                f"❓ Uncategorized: {len(uncategorized)}\n"
+                f"❓ Uncategorized: {uncategorized_count}\n"
                 f"📤 Notifications sent: {notified}"
             )
-            if len(uncategorized) > 10:
+            if uncategorized_count > 10:
                 text_no_md += f"\n\n⚠️ Only sent notifications for first 10 uncategorized products.\nRun command again to process more."
             await status_msg.edit_text(text_no_md)
         logger.info(f"Admin {user_id} triggered recategorization - sent {notified} notifications")
@@ -537,6 +532,7 @@ async def recategorize_command(update: Update, context: ContextTypes.DEFAULT_TYP
         )
 
 
+@admin_only
 async def block_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /block command - block a user from using the bot (admin only).
     
@@ -545,12 +541,6 @@ async def block_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     user_id = update.effective_user.id
     
-    if not is_admin(user_id):
-        await update.message.reply_text(
-            "❌ This command is only available for administrators."
-        )
-        return
-    
     # Check arguments
     if not context.args or len(context.args) < 1:
         try:
@@ -571,9 +561,14 @@ async def block_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
         return
     
+    target_user_id = parse_user_id(context.args[0])
+    if target_user_id is None:
+        await update.message.reply_text(
+            "❌ Invalid user ID. Please provide a valid number."
+        )
+        return
+    
     try:
-        target_user_id = int(context.args[0])
-        
         # Prevent blocking admins
         if is_admin(target_user_id):
             await update.message.reply_text(
@@ -581,8 +576,14 @@ async def block_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return
         
-        # Block the user
-        await db.block_user(target_user_id)
+        # Block the user (only users who have interacted with the bot are known)
+        if not await db.block_user(target_user_id):
+            await update.message.reply_text(
+                f"❌ User {target_user_id} not found.\n\n"
+                "Only users who have interacted with the bot can be blocked.\n"
+                "💡 Tip: Use /users to find user IDs"
+            )
+            return
         
         try:
             await update.message.reply_text(
@@ -602,10 +603,6 @@ async def block_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
         logger.info(f"Admin {user_id} blocked user {target_user_id}")
         
-    except ValueError:
-        await update.message.reply_text(
-            "❌ Invalid user ID. Please provide a valid number."
-        )
     except Exception as e:
         logger.error(f"Error in block command: {e}", exc_info=True)
         await update.message.reply_text(
@@ -613,6 +610,7 @@ async def block_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
 
+@admin_only
 async def unblock_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /unblock command - unblock a user (admin only).
     
@@ -621,12 +619,6 @@ async def unblock_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     user_id = update.effective_user.id
     
-    if not is_admin(user_id):
-        await update.message.reply_text(
-            "❌ This command is only available for administrators."
-        )
-        return
-    
     # Check arguments
     if not context.args or len(context.args) < 1:
         try:
@@ -645,9 +637,14 @@ async def unblock_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
         return
     
+    target_user_id = parse_user_id(context.args[0])
+    if target_user_id is None:
+        await update.message.reply_text(
+            "❌ Invalid user ID. Please provide a valid number."
+        )
+        return
+    
     try:
-        target_user_id = int(context.args[0])
-        
         # Unblock the user
         await db.unblock_user(target_user_id)
         
@@ -667,10 +664,6 @@ async def unblock_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
         logger.info(f"Admin {user_id} unblocked user {target_user_id}")
         
-    except ValueError:
-        await update.message.reply_text(
-            "❌ Invalid user ID. Please provide a valid number."
-        )
     except Exception as e:
         logger.error(f"Error in unblock command: {e}", exc_info=True)
         await update.message.reply_text(
@@ -678,6 +671,7 @@ async def unblock_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
 
+@admin_only
 async def send_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /send command - initiate broadcast to single user (admin only).
     
@@ -691,12 +685,6 @@ async def send_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     user_id = update.effective_user.id
     
-    if not is_admin(user_id):
-        await update.message.reply_text(
-            "❌ This command is only available for administrators."
-        )
-        return
-    
     # Start the workflow - ask for user ID
     context.user_data['broadcast_mode'] = 'single_user'
     context.user_data['broadcast_step'] = 'awaiting_user_id'
@@ -716,6 +704,7 @@ async def send_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info(f"Admin {user_id} started single user broadcast workflow")
 
 
+@admin_only
 async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /broadcast command - initiate broadcast to all users (admin only).
     
@@ -727,12 +716,6 @@ async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     user_id = update.effective_user.id
     
-    if not is_admin(user_id):
-        await update.message.reply_text(
-            "❌ This command is only available for administrators."
-        )
-        return
-    
     # Start the workflow - ask for message
     context.user_data['broadcast_mode'] = 'all_users'
     context.user_data['broadcast_step'] = 'awaiting_message'
@@ -766,53 +749,52 @@ async def handle_broadcast_workflow(update: Update, context: ContextTypes.DEFAUL
     if broadcast_mode == 'single_user':
         if broadcast_step == 'awaiting_user_id':
             # Step 1: Received user ID, now ask for message
-            try:
-                target_user_id = int(message_text.strip())
-                
-                # Check if user exists and is not blocked
-                is_blocked = await db.is_user_blocked(target_user_id)
-                if is_blocked:
-                    try:
-                        await update.message.reply_text(
-                            f"❌ Cannot send message to blocked user `{target_user_id}`.\n\n"
-                            "Broadcast cancelled. Use /send to start again.",
-                            parse_mode="Markdown"
-                        )
-                    except BadRequest as e:
-                        logger.warning(f"Markdown parse error in handle_broadcast_workflow (blocked), retrying without parse_mode: {e}")
-                        await update.message.reply_text(
-                            f"❌ Cannot send message to blocked user {target_user_id}.\n\n"
-                            "Broadcast cancelled. Use /send to start again."
-                        )
-                    context.user_data.clear()
-                    return
-                
-                # Store user ID and move to next step
-                context.user_data['target_user_id'] = target_user_id
-                context.user_data['broadcast_step'] = 'awaiting_message'
-                
+            target_user_id = parse_user_id(message_text)
+            if target_user_id is None:
+                await update.message.reply_text(
+                    "❌ Invalid user ID. Please enter a valid number.\n\n"
+                    "Broadcast cancelled. Use /send to start again."
+                )
+                context.user_data.clear()
+                return
+            
+            # Check if user exists and is not blocked
+            is_blocked = await db.is_user_blocked(target_user_id)
+            if is_blocked:
                 try:
                     await update.message.reply_text(
-                        f"📝 **Broadcast to Single User - Step 2 of 3**\n\n"
-                        f"🆔 User ID: `{target_user_id}`\n\n"
-                        f"Please enter the message you want to send:",
+                        f"❌ Cannot send message to blocked user `{target_user_id}`.\n\n"
+                        "Broadcast cancelled. Use /send to start again.",
                         parse_mode="Markdown"
                     )
                 except BadRequest as e:
-                    logger.warning(f"Markdown parse error in handle_broadcast_workflow (step 2), retrying without parse_mode: {e}")
+                    logger.warning(f"Markdown parse error in handle_broadcast_workflow (blocked), retrying without parse_mode: {e}")
                     await update.message.reply_text(
-                        f"📝 Broadcast to Single User - Step 2 of 3\n\n"
-                        f"🆔 User ID: {target_user_id}\n\n"
-                        f"Please enter the message you want to send:"
+                        f"❌ Cannot send message to blocked user {target_user_id}.\n\n"
+                        "Broadcast cancelled. Use /send to start again."
                     )
-                logger.info(f"Admin {user_id} entered user ID: {target_user_id}")
-                
-            except ValueError:
+                context.user_data.clear()
+                return
+            
+            # Store user ID and move to next step
+            context.user_data['target_user_id'] = target_user_id
+            context.user_data['broadcast_step'] = 'awaiting_message'
+            
+            try:
                 await update.message.reply_text(
-                    "❌ Invalid user ID. Please enter a valid number.\n\n"
-                    "Broadcast cancelled. Use /send to start again."
+                    f"📝 **Broadcast to Single User - Step 2 of 3**\n\n"
+                    f"🆔 User ID: `{target_user_id}`\n\n"
+                    f"Please enter the message you want to send:",
+                    parse_mode="Markdown"
                 )
-                context.user_data.clear()
+            except BadRequest as e:
+                logger.warning(f"Markdown parse error in handle_broadcast_workflow (step 2), retrying without parse_mode: {e}")
+                await update.message.reply_text(
+                    f"📝 Broadcast to Single User - Step 2 of 3\n\n"
+                    f"🆔 User ID: {target_user_id}\n\n"
+                    f"Please enter the message you want to send:"
+                )
+            logger.info(f"Admin {user_id} entered user ID: {target_user_id}")
                 
         elif broadcast_step == 'awaiting_message':
             # Step 2: Received message, show confirmation
@@ -821,7 +803,6 @@ async def handle_broadcast_workflow(update: Update, context: ContextTypes.DEFAUL
             context.user_data['broadcast_step'] = 'awaiting_confirmation'
             
             # Show confirmation with inline buttons
-            from telegram import InlineKeyboardButton, InlineKeyboardMarkup
             keyboard = InlineKeyboardMarkup([
                 [InlineKeyboardButton("✅ Confirm & Send", callback_data=f"broadcast_confirm_single|{target_user_id}")],
                 [InlineKeyboardButton("❌ Cancel", callback_data="broadcast_cancel")]
@@ -866,7 +847,6 @@ async def handle_broadcast_workflow(update: Update, context: ContextTypes.DEFAUL
             user_count = len([u for u in users if not u.get('is_blocked', 0) and not is_admin(u['user_id'])])
             
             # Show confirmation with inline buttons
-            from telegram import InlineKeyboardButton, InlineKeyboardMarkup
             keyboard = InlineKeyboardMarkup([
                 [InlineKeyboardButton("✅ Confirm & Broadcast", callback_data="broadcast_confirm_all")],
                 [InlineKeyboardButton("❌ Cancel", callback_data="broadcast_cancel")]
@@ -901,16 +881,11 @@ async def handle_broadcast_workflow(update: Update, context: ContextTypes.DEFAUL
             logger.info(f"Admin {user_id} awaiting confirmation for broadcast to all users")
 
 
+@admin_only
 async def setcontact_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /setcontact command - set the order contact username (admin only)."""
     user_id = update.effective_user.id
     
-    if not is_admin(user_id):
-        await update.message.reply_text(
-            "❌ This command is only available for administrators."
-        )
-        return
-    
     # Get current contact
     current_contact = await db.get_order_contact()
     
@@ -983,20 +958,12 @@ async def handle_setcontact_input(update: Update, context: ContextTypes.DEFAULT_
     logger.info(f"Admin {user_id} updated order contact to: {contact}")
 
 
+@admin_only
 async def clearcache_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /clearcache command - clear the file ID cache (admin only)."""
     user_id = update.effective_user.id
     
-    if not is_admin(user_id):
-        await update.message.reply_text(
-            "❌ This command is only available for administrators."
-        )
-        return
-    
     try:
-        # Import the cache clearing function
-        from utils.helpers import clear_file_id_cache
-        
         # Clear the cache
         deleted_count = await clear_file_id_cache()
         
@@ -1025,16 +992,9 @@ async def clearcache_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
 
 
+@admin_only
 async def botusers_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /botusers command - view users grouped by bot username (admin only)."""
-    user_id = update.effective_user.id
-    
-    if not is_admin(user_id):
-        await update.message.reply_text(
-            "❌ This command is only available for administrators."
-        )
-        return
-    
     try:
         # Get active bot usernames from webhook server (already lowercase)
         from webhook_server import get_bot_usernames
@@ -1268,16 +1228,11 @@ async def show_bot_users_page(update: Update, context: ContextTypes.DEFAULT_TYPE
         await query.answer("An error occurred", show_alert=True)
 
 
+@admin_only
 async def prunebots_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /prunebots command - prune users from inactive/deleted bots (admin only)."""
     user_id = update.effective_user.id
     
-    if not is_admin(user_id):
-        await update.message.reply_text(
-            "❌ This command is only available for administrators."
-        )
-        return
-    
     try:
         # Get active bot usernames from webhook server
         from webhook_server import get_bot_usernames
@@ -1,18 +1,49 @@
 """
 Language settings handler.
 """
+import asyncio
 import logging
+from typing import Dict, Optional
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from database import Database
+from telegram.error import BadRequest, TelegramError
+from database import get_db
 from translations.language_config import LANGUAGE_DISPLAY, is_valid_language, DEFAULT_LANGUAGE
-from translations.translator import get_translated_string_async
+from translations.translator import get_translated_string_async, get_translated_strings_async
 from utils.helpers import is_admin, get_user_display_name, ADMIN_COMMANDS_FALLBACK, escape_markdown_v1
+from handlers.start import get_welcome_keyboard
+from utils.chat_dispatcher import ordered_per_chat
+from utils.reply import is_media_message
 
 logger = logging.getLogger(__name__)
-db = Database()
+db = get_db()
 
 
+def _build_language_keyboard(current_lang: Optional[str]) -> InlineKeyboardMarkup:
+    """Build the language selection keyboard with current_lang marked (if any)."""
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(
+            f"✓ {display_name}" if lang_code == current_lang else display_name,
+            callback_data=f"setlang|{lang_code}"
+        )]
+        for lang_code, display_name in LANGUAGE_DISPLAY.items()
+    ])
+
+
+# Language selector keyboards, built once at import - one per current language
+# (only the ✓ marker differs), plus an unmarked one for unknown language codes
+_LANG_KEYBOARDS: Dict[Optional[str], InlineKeyboardMarkup] = {
+    current_lang: _build_language_keyboard(current_lang)
+    for current_lang in [*LANGUAGE_DISPLAY, None]
+}
+
+
+def get_language_keyboard(current_lang: str) -> InlineKeyboardMarkup:
+    """Get the language selection keyboard with the current language marked."""
+    return _LANG_KEYBOARDS.get(current_lang, _LANG_KEYBOARDS[None])
+
+
+@ordered_per_chat
 async def language_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /language command - show language selection menu."""
     user_id = update.effective_user.id
@@ -20,27 +51,15 @@ async def language_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Get current language
     current_lang = await db.get_user_language(user_id)
     
-    # Create language selection keyboard
-    keyboard_buttons = []
-    
-    for lang_code, display_name in LANGUAGE_DISPLAY.items():
-        # Add checkmark for current language
-        if lang_code == current_lang:
-            display_name = f"✓ {display_name}"
-        
-        keyboard_buttons.append([
-            InlineKeyboardButton(display_name, callback_data=f"setlang|{lang_code}")
-        ])
-    
-    keyboard = InlineKeyboardMarkup(keyboard_buttons)
+    # Get language selection keyboard (current language is marked)
+    keyboard = get_language_keyboard(current_lang)
     
     # Get translated message
-    message_text = await get_translated_string_async("language_settings", current_lang)
     current_lang_name = LANGUAGE_DISPLAY.get(current_lang, LANGUAGE_DISPLAY[DEFAULT_LANGUAGE])
-    current_lang_text = await get_translated_string_async(
-        "current_language", 
+    message_text, current_lang_text = await get_translated_strings_async(
+        ["language_settings", "current_language"],
         current_lang,
-        language=current_lang_name
+        format_kwargs={"current_language": {"language": current_lang_name}}
     )
     
     message_text += f"\n\n{current_lang_text}"
@@ -53,6 +72,16 @@ async def language_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info(f"User {user_id} opened language settings (current: {current_lang})")
 
 
+async def _safe_delete(query) -> None:
+    """Delete the callback query's message, ignoring Telegram errors."""
+    try:
+        await query.delete_message()
+    except BadRequest:
+        pass  # Already deleted or too old to delete
+    except TelegramError as e:
+        logger.debug(f"Could not delete message: {e}")
+
+
 async def handle_language_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, lang_code: str):
     """Handle language selection callback."""
     user_id = update.effective_user.id
@@ -66,62 +95,61 @@ async def handle_language_callback(update: Update, context: ContextTypes.DEFAULT
     # Update user's language preference
     await db.set_user_language(user_id, lang_code)
     
-    # Get confirmation message in the new language
+    # Fetch the confirmation message (in the new language) and welcome data together
     lang_display_name = LANGUAGE_DISPLAY.get(lang_code, LANGUAGE_DISPLAY[DEFAULT_LANGUAGE])
-    confirmation = await get_translated_string_async(
-        "language_changed",
-        lang_code,
-        language=lang_display_name
+    confirmation, is_subscribed, order_contact = await asyncio.gather(
+        get_translated_string_async("language_changed", lang_code, language=lang_display_name),
+        db.is_user_subscribed(user_id),
+        db.get_order_contact()
     )
     
     await query.answer(confirmation, show_alert=True)
     
-    # Delete the language selection message
-    try:
-        await query.delete_message()
-    except:
-        pass
-    
     # Show welcome message in the new language (return to start page)
     user = update.effective_user
     
     # Get user's full display name - escaped for markdown
     display_name = get_user_display_name(user, escaped=True)
     
-    is_subscribed = await db.is_user_subscribed(user_id)
-    
-    # Get order contact
-    order_contact = await db.get_order_contact()
-    
-    # Get translated welcome message with contact - name and contact are already escaped
+    # Get translated welcome message with contact (plus admin info for admins) and keyboard
+    # - name and contact are already escaped
     escaped_contact = escape_markdown_v1(order_contact)
-    welcome_text = await get_translated_string_async("welcome_with_contact", lang_code, name=display_name, contact=escaped_contact)
+    user_is_admin = is_admin(user_id)
+    keys = ["welcome_with_contact", "admin_commands_info"] if user_is_admin else ["welcome_with_contact"]
+    translated, keyboard = await asyncio.gather(
+        get_translated_strings_async(
+            keys,
+            lang_code,
+            format_kwargs={"welcome_with_contact": {"name": display_name, "contact": escaped_contact}}
+        ),
+        get_welcome_keyboard(lang_code, is_subscribed)
+    )
+    welcome_text = translated[0]
     
     # Add admin command info for admins
-    if is_admin(user_id):
-        admin_info = await get_translated_string_async("admin_commands_info", lang_code)
+    if user_is_admin:
+        admin_info = translated[1]
         if admin_info != "admin_commands_info":  # Only add if translation exists
             welcome_text += f"\n\n{admin_info}"
         else:
             # Use fallback constant
             welcome_text += ADMIN_COMMANDS_FALLBACK
     
-    view_catalog_text = await get_translated_string_async("view_catalog", lang_code)
-    change_language_text = await get_translated_string_async("change_language", lang_code)
-    
-    keyboard_buttons = [
-        [InlineKeyboardButton(view_catalog_text, callback_data="categories")],
-        [InlineKeyboardButton(change_language_text, callback_data="open_language_settings")]
-    ]
-    
-    if not is_subscribed:
-        resubscribe_text = await get_translated_string_async("resubscribe_notifications", lang_code)
-        keyboard_buttons.append(
-            [InlineKeyboardButton(resubscribe_text, callback_data="toggle_notifications")]
-        )
-    
-    keyboard = InlineKeyboardMarkup(keyboard_buttons)
-    
+    # Replace the language selection message with the welcome message in place
+    # (one request instead of delete + send)
+    if query.message and not is_media_message(query.message):
+        try:
+            await query.edit_message_text(
+                welcome_text,
+                reply_markup=keyboard,
+                parse_mode="Markdown"
+            )
+            logger.info(f"User {user_id} changed language to {lang_code}")
+            return
+        except BadRequest as e:
+            logger.debug(f"Could not edit language selection message, sending a new one: {e}")
+    
+    await _safe_delete(query)
     await context.bot.send_message(
         chat_id=update.effective_chat.id,
         text=welcome_text,
@@ -1,100 +1,256 @@
 """
 Menu and catalog handlers.
 """
+import asyncio
 import logging
+import re
+import aiosqlite
+from datetime import datetime, timedelta
+from typing import Dict, Tuple
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from telegram.error import TelegramError
-from database import Database
-from utils.pagination import create_pagination_keyboard, paginate_items
+from database import get_db
+from utils.pagination import create_product_buttons, clamp_page
+from utils.reply import reply_or_edit
+from utils.chat_dispatcher import ordered_per_chat
+from utils.single_flight import run_once
 from utils.helpers import is_admin
 from utils.categories import get_all_categories, get_category_display_name, get_subcategories, get_subcategory_display_name, CATEGORIES, EXCLUDED_FROM_ALL_PRODUCTS
-from translations.translator import get_translated_string_async
+from translations.translator import (
+    get_translated_string_async,
+    get_translated_strings_async,
+    get_translated_string_checked_async,
+    get_translated_strings_checked_async,
+)
+from translations.language_config import DEFAULT_LANGUAGE
 
 logger = logging.getLogger(__name__)
-db = Database()
+db = get_db()
 
+CATALOG_PAGE_SIZE = 5  # Products per catalog page
 
+# Catalog buttons that only depend on language and listing (not on the page) - built once.
+# English fallbacks from a failed translation aren't remembered, so they're retried next time.
+_BACK_BUTTON_CACHE: Dict[Tuple[str, str], InlineKeyboardButton] = {}
+_EMPTY_LISTING_KEYBOARD_CACHE: Dict[Tuple[str, str, str], InlineKeyboardMarkup] = {}
+
+# Translation key ("category_<name>") per category - categories are fixed, so built once
+_CATEGORY_TRANSLATION_KEYS = {category: f"category_{category.lower()}" for category in get_all_categories()}
+
+# Category menu entries as (category, translation key, callback data).
+# Categories with subcategories open the subcategory menu, others go directly to products.
+_CATEGORY_MENU_ITEMS = tuple(
+    (
+        category,
+        _CATEGORY_TRANSLATION_KEYS[category],
+        f"browse_category|{category}" if get_subcategories(category) else f"category|{category}|1"
+    )
+    for category in get_all_categories()
+)
+_CATEGORY_MENU_TRANSLATION_KEYS = [key for _, key, _ in _CATEGORY_MENU_ITEMS] + ["all_products", "product_categories"]
+
+# Category menu (text, keyboard, built_at) per language - identical for every user, so shared briefly
+_CATEGORY_MENU_CACHE: Dict[str, Tuple[str, InlineKeyboardMarkup, datetime]] = {}
+CATEGORY_MENU_TTL_SECONDS = 1
+
+
+def _back_button_key(back_data: str) -> str:
+    """Get the translation key of the back button for a listing's back callback data."""
+    return "button_back_to_categories" if back_data == "categories" else "button_back_to_subcategories"
+
+
+async def _get_back_button(lang: str, back_data: str) -> InlineKeyboardButton:
+    """
+    Get the back button for a catalog listing (cached).
+    
+    Args:
+        lang: User's language code
+        back_data: "categories", or "browse_category|<category>" for subcategory listings
+    
+    Returns:
+        Back to categories / subcategories button
+    """
+    cache_key = (lang, back_data)
+    button = _BACK_BUTTON_CACHE.get(cache_key)
+    if button is None:
+        back_text, translated = await get_translated_string_checked_async(_back_button_key(back_data), lang)
+        button = InlineKeyboardButton(back_text, callback_data=back_data)
+        if translated:
+            _BACK_BUTTON_CACHE[cache_key] = button
+    return button
+
+
+async def _get_empty_listing_keyboard(lang: str, back_data: str, refresh_data: str) -> InlineKeyboardMarkup:
+    """
+    Get the back + refresh keyboard shown for a listing without products (cached).
+    
+    Args:
+        lang: User's language code
+        back_data: Callback data for the back button
+        refresh_data: Callback data reloading the first page of the listing
+    
+    Returns:
+        InlineKeyboardMarkup with back and refresh buttons
+    """
+    cache_key = (lang, back_data, refresh_data)
+    keyboard = _EMPTY_LISTING_KEYBOARD_CACHE.get(cache_key)
+    if keyboard is None:
+        (back_text, refresh_text), translated = await get_translated_strings_checked_async(
+            [_back_button_key(back_data), "button_refresh"],
+            lang
+        )
+        keyboard = InlineKeyboardMarkup([
+            [InlineKeyboardButton(back_text, callback_data=back_data)],
+            [InlineKeyboardButton(refresh_text, callback_data=refresh_data)]
+        ])
+        if translated:
+            _EMPTY_LISTING_KEYBOARD_CACHE[cache_key] = keyboard
+    return keyboard
+
+
+async def _get_category_name(lang: str, category: str) -> str:
+    """Get the translated name of a category, falling back to its display name."""
+    category_key = _CATEGORY_TRANSLATION_KEYS.get(category) or f"category_{category.lower()}"
+    translated_category = await get_translated_string_async(category_key, lang)
+    if translated_category == category_key:
+        return get_category_display_name(category)
+    return translated_category
+
+
+async def _get_catalog_title(lang: str, category: str = None, subcategory: str = None) -> str:
+    """Get the translated title of a catalog listing."""
+    if not category:
+        all_products_text = await get_translated_string_async("all_products", lang)
+        return f"📋 {all_products_text}"
+    
+    translated_category = await _get_category_name(lang, category)
+    if not subcategory:
+        return f"📋 {translated_category}"
+    
+    # Translate subcategory name
+    translated_subcategory = get_subcategory_display_name(subcategory, lang)
+    return f"📋 {translated_category} • {translated_subcategory}"
+
+
+def _is_listing_message(update: Update, title: str) -> bool:
+    """Check whether the pressed button belongs to a catalog listing with the given title."""
+    message = update.callback_query.message if update.callback_query else None
+    return bool(message and message.text and message.text.startswith(title))
+
+
+def _is_listing_on_page(update: Update, title: str, page: int, total_pages: int) -> bool:
+    """
+    Check whether the pressed button belongs to the given page of a catalog listing
+    with the current page count, judged by the page indicator button on screen.
+    
+    Args:
+        update: Telegram update with a callback query
+        title: Listing title
+        page: Page number
+        total_pages: Current total number of pages
+    
+    Returns:
+        True if re-rendering the page would show the same page indicator
+    """
+    if not _is_listing_message(update, title):
+        return False
+    markup = update.callback_query.message.reply_markup
+    indicators = [
+        button.text
+        for row in (markup.inline_keyboard if markup else ())
+        for button in row
+        if button.callback_data == "noop"
+    ]
+    # Single-page listings have no indicator
+    if total_pages <= 1:
+        return not indicators
+    page_count = re.compile(rf"(?<!\d){page}/{total_pages}(?!\d)")
+    return any(page_count.search(text) for text in indicators)
+
+
+@ordered_per_chat
 async def menu_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /menu command - show category selection."""
     await show_category_menu(update, context)
 
 
+async def _build_category_menu(lang: str) -> Tuple[str, InlineKeyboardMarkup]:
+    """
+    Build the category selection menu in the given language.
+    
+    Args:
+        lang: User's language code
+    
+    Returns:
+        Tuple of (message text, keyboard)
+    """
+    # Get all category counts in a single query (optimized)
+    category_counts = await db.get_all_category_counts()
+    total_count = await db.count_products_excluding_categories(EXCLUDED_FROM_ALL_PRODUCTS)
+    
+    # Translate every label in one batch
+    *display_names, all_products_text, text = await get_translated_strings_async(
+        _CATEGORY_MENU_TRANSLATION_KEYS,
+        lang
+    )
+    
+    # "All Products" option first
+    category_buttons = [
+        [InlineKeyboardButton(f"{all_products_text} ({total_count})", callback_data="menu|1")]
+    ]
+    
+    for (category, category_key, callback_data), display_name in zip(_CATEGORY_MENU_ITEMS, display_names):
+        # If translation not found, fall back to original display name
+        if display_name == category_key:
+            display_name = get_category_display_name(category)
+        
+        button_text = f"{display_name} ({category_counts.get(category, 0)})"
+        category_buttons.append([
+            InlineKeyboardButton(button_text, callback_data=callback_data)
+        ])
+    
+    return text, InlineKeyboardMarkup(category_buttons)
+
+
+async def get_category_menu(lang: str) -> Tuple[str, InlineKeyboardMarkup]:
+    """
+    Get the category selection menu, shared by everyone using the same language.
+    
+    The built menu is reused for CATEGORY_MENU_TTL_SECONDS, and concurrent
+    requests while it is being built share one build.
+    
+    Args:
+        lang: User's language code
+    
+    Returns:
+        Tuple of (message text, keyboard)
+    """
+    cached = _CATEGORY_MENU_CACHE.get(lang)
+    if cached is not None:
+        text, keyboard, built_at = cached
+        if datetime.now() - built_at < timedelta(seconds=CATEGORY_MENU_TTL_SECONDS):
+            return text, keyboard
+    
+    text, keyboard = await run_once(("category_menu", lang), lambda: _build_category_menu(lang))
+    _CATEGORY_MENU_CACHE[lang] = (text, keyboard, datetime.now())
+    return text, keyboard
+
+
 async def show_category_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show category selection menu."""
+    user_lang = DEFAULT_LANGUAGE  # Also used for the error message if loading the preference fails
     try:
         # Get user's language preference
         user_id = update.effective_user.id
         user_lang = await db.get_user_language(user_id)
         
-        # Get all category counts in a single query (optimized)
-        category_counts = await db.get_all_category_counts()
-        category_buttons = []
-        
-        for category in get_all_categories():
-            count = category_counts.get(category, 0)
-            # Translate category display name
-            category_key = f"category_{category.lower()}"
-            display_name = await get_translated_string_async(category_key, user_lang)
-            # If translation not found, fall back to original display name
-            if display_name == category_key:
-                display_name = get_category_display_name(category)
-            
-            button_text = f"{display_name} ({count})"
-            
-            # Check if category has subcategories
-            subcategories = get_subcategories(category)
-            
-            if subcategories:
-                # Use browse_category to show subcategory menu
-                callback_data = f"browse_category|{category}"
-            else:
-                # No subcategories, go directly to products
-                callback_data = f"category|{category}|1"
-            
-            category_buttons.append([
-                InlineKeyboardButton(button_text, callback_data=callback_data)
-            ])
+        text, keyboard = await get_category_menu(user_lang)
         
-        # Add "All Products" option
-        total_count = await db.count_products_excluding_categories(EXCLUDED_FROM_ALL_PRODUCTS)
-        all_products_text = await get_translated_string_async("all_products", user_lang)
-        category_buttons.insert(0, [
-            InlineKeyboardButton(f"{all_products_text} ({total_count})", callback_data="menu|1")
-        ])
-        
-        keyboard = InlineKeyboardMarkup(category_buttons)
-        
-        text = await get_translated_string_async("product_categories", user_lang)
-        
-        if update.callback_query:
-            message = update.callback_query.message
-            if message.photo or message.video or message.document or message.animation or message.audio:
-                # Don't delete media message - send new message to preserve product view
-                await context.bot.send_message(
-                    chat_id=update.effective_chat.id,
-                    text=text,
-                    reply_markup=keyboard,
-                    parse_mode="Markdown"
-                )
-            else:
-                await update.callback_query.edit_message_text(
-                    text,
-                    reply_markup=keyboard,
-                    parse_mode="Markdown"
-                )
-        else:
-            await update.message.reply_text(
-                text,
-                reply_markup=keyboard,
-                parse_mode="Markdown"
-            )
+        await reply_or_edit(update, context, text, keyboard)
             
     except Exception as e:
         logger.error(f"Error showing category menu: {e}")
-        # Get user's language preference for error message
-        user_id = update.effective_user.id
-        user_lang = await db.get_user_language(user_id)
         error_text = await get_translated_string_async("error_occurred", user_lang)
         if update.callback_query:
             await update.callback_query.answer(error_text, show_alert=True)
@@ -104,6 +260,7 @@ async def show_category_menu(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
 async def show_subcategory_menu(update: Update, context: ContextTypes.DEFAULT_TYPE, category: str):
     """Show subcategory selection menu for a given category."""
+    user_lang = DEFAULT_LANGUAGE  # Also used for the error message if loading the preference fails
     try:
         # Get user's language preference
         user_id = update.effective_user.id
@@ -114,16 +271,33 @@ async def show_subcategory_menu(update: Update, context: ContextTypes.DEFAULT_TY
         
         if not subcategories:
             # No subcategories, go directly to catalog
-            await show_catalog_page(update, context, page=1, category=category)
+            await show_catalog_page(update, context, page=1, category=category, user_lang=user_lang)
             return
         
         # Get subcategory counts from database
         subcategory_counts = await db.get_subcategories_with_counts(category)
         count_dict = {item["subcategory"]: item["count"] for item in subcategory_counts}
         
-        # Build subcategory buttons
-        subcategory_buttons = []
+        # "All in Category" option first (subcategory counts include products without a subcategory)
+        all_count = sum(item["count"] for item in subcategory_counts)
+        # Translate category name and prompt, and get the (cached) back button together
+        translated_category, select_subcat_text, back_button = await asyncio.gather(
+            _get_category_name(user_lang, category),
+            get_translated_string_async("select_subcategory", user_lang),
+            _get_back_button(user_lang, "categories")
+        )
         
+        all_in_category_text = await get_translated_string_async("button_all_in_category", user_lang, category=translated_category)
+        if all_in_category_text == "button_all_in_category":
+            all_in_category_text = f"📦 All {translated_category} ({all_count})"
+        else:
+            all_in_category_text = f"{all_in_category_text} ({all_count})"
+        
+        subcategory_buttons = [
+            [InlineKeyboardButton(all_in_category_text, callback_data=f"category|{category}|1")]
+        ]
+        
+        # Subcategory buttons
         for subcat in subcategories:
             count = count_dict.get(subcat, 0)
             # Get translated subcategory name
@@ -133,64 +307,20 @@ async def show_subcategory_menu(update: Update, context: ContextTypes.DEFAULT_TY
                 InlineKeyboardButton(button_text, callback_data=f"subcategory|{category}|{subcat}|1")
             ])
         
-        # Add "All in Category" option
-        all_count = await db.count_products_by_category(category)
-        # Translate category name
-        category_key = f"category_{category.lower()}"
-        translated_category = await get_translated_string_async(category_key, user_lang)
-        if translated_category == category_key:
-            translated_category = get_category_display_name(category)
-        
-        all_in_category_text = await get_translated_string_async("button_all_in_category", user_lang, category=translated_category)
-        if all_in_category_text == "button_all_in_category":
-            all_in_category_text = f"📦 All {translated_category} ({all_count})"
-        else:
-            all_in_category_text = f"{all_in_category_text} ({all_count})"
-        
-        subcategory_buttons.insert(0, [
-            InlineKeyboardButton(all_in_category_text, callback_data=f"category|{category}|1")
-        ])
-        
         # Add back button
-        back_to_cats_text = await get_translated_string_async("button_back_to_categories", user_lang)
-        subcategory_buttons.append([
-            InlineKeyboardButton(back_to_cats_text, callback_data="categories")
-        ])
+        subcategory_buttons.append([back_button])
         
         keyboard = InlineKeyboardMarkup(subcategory_buttons)
         
-        select_subcat_text = await get_translated_string_async("select_subcategory", user_lang)
         text = (
             f"📂 **{translated_category}**\n\n"
             f"{select_subcat_text}"
         )
         
-        if update.callback_query:
-            message = update.callback_query.message
-            if message.photo or message.video or message.document or message.animation or message.audio:
-                # Don't delete media message - send new message to preserve product view
-                await context.bot.send_message(
-                    chat_id=update.effective_chat.id,
-                    text=text,
-                    reply_markup=keyboard,
-                    parse_mode="Markdown"
-                )
-            else:
-                await update.callback_query.edit_message_text(
-                    text,
-                    reply_markup=keyboard,
-                    parse_mode="Markdown"
-                )
-        else:
-            await update.message.reply_text(
-                text,
-                reply_markup=keyboard,
-                parse_mode="Markdown"
-            )
+        await reply_or_edit(update, context, text, keyboard)
             
     except Exception as e:
         logger.error(f"Error showing subcategory menu: {e}")
-        user_lang = await db.get_user_language(update.effective_user.id)
         error_text = await get_translated_string_async("error_occurred", user_lang)
         if update.callback_query:
             await update.callback_query.answer(error_text, show_alert=True)
@@ -198,185 +328,141 @@ async def show_subcategory_menu(update: Update, context: ContextTypes.DEFAULT_TY
             await update.message.reply_text(error_text)
 
 
-async def show_catalog_page(update: Update, context: ContextTypes.DEFAULT_TYPE, page: int = 1, category: str = None, subcategory: str = None):
-    """Show a page of the catalog, optionally filtered by category and subcategory."""
+async def _send_catalog_error(update: Update, user_lang: str = None):
+    """Tell the user a catalog listing couldn't be loaded."""
+    error_text = await get_translated_string_async("error_occurred", user_lang or DEFAULT_LANGUAGE)
+    await update.effective_message.reply_text(error_text)
+
+
+async def show_catalog_page(update: Update, context: ContextTypes.DEFAULT_TYPE, page: int = 1, category: str = None, subcategory: str = None, user_lang: str = None):
+    """
+    Show a page of the catalog, optionally filtered by category and subcategory.
+    
+    Database errors are reported to the user here; Telegram errors while
+    sending propagate to the application's error handler.
+    """
+    user_id = update.effective_user.id
+    
+    async def get_lang_and_title():
+        # Language lookup (unless the caller already has it) followed by the title translation
+        lang = user_lang or await db.get_user_language(user_id)
+        return lang, await _get_catalog_title(lang, category, subcategory)
+    
     try:
-        # Get user's language preference
-        user_id = update.effective_user.id
-        user_lang = await db.get_user_language(user_id)
-        
-        # Get products (filtered by category and/or subcategory if specified)
-        if category and subcategory:
-            all_products = await db.get_products_by_category_and_subcategory(category, subcategory)
-            # Translate category name
-            category_key = f"category_{category.lower()}"
-            translated_category = await get_translated_string_async(category_key, user_lang)
-            if translated_category == category_key:
-                translated_category = get_category_display_name(category)
-            # Translate subcategory name
-            translated_subcategory = get_subcategory_display_name(subcategory, user_lang)
-            title = f"📋 {translated_category} • {translated_subcategory}"
-        elif category:
-            all_products = await db.get_products_by_category(category)
-            # Translate category name
-            category_key = f"category_{category.lower()}"
-            translated_category = await get_translated_string_async(category_key, user_lang)
-            if translated_category == category_key:
-                translated_category = get_category_display_name(category)
-            title = f"📋 {translated_category}"
-        else:
-            # When showing all products, exclude specified categories
-            all_products = await db.get_all_products_excluding_categories(EXCLUDED_FROM_ALL_PRODUCTS)
-            all_products_text = await get_translated_string_async("all_products", user_lang)
-            title = f"📋 {all_products_text}"
-        
-        if not all_products:
-            context_str = 'subcategory' if subcategory else 'category' if category else 'catalog'
-            text = await get_translated_string_async("no_products_in_category", user_lang, context=context_str)
-            if text == "no_products_in_category":
-                text = f"📭 No products in this {context_str}."
-            
-            # Build back button based on context
-            back_buttons = []
-            back_to_subcats_text = await get_translated_string_async("button_back_to_subcategories", user_lang)
-            back_to_cats_text = await get_translated_string_async("button_back_to_categories", user_lang)
-            refresh_text = await get_translated_string_async("button_refresh", user_lang)
-            
-            if subcategory and category:
-                back_buttons.append([InlineKeyboardButton(back_to_subcats_text, callback_data=f"browse_category|{category}")])
-            elif category:
-                back_buttons.append([InlineKeyboardButton(back_to_cats_text, callback_data="categories")])
-            else:
-                back_buttons.append([InlineKeyboardButton(back_to_cats_text, callback_data="categories")])
-            
-            # Add refresh button
-            if subcategory and category:
-                refresh_data = f"subcategory|{category}|{subcategory}|1"
-            elif category:
-                refresh_data = f"category|{category}|1"
-            else:
-                refresh_data = "menu|1"
-            back_buttons.append([InlineKeyboardButton(refresh_text, callback_data=refresh_data)])
-            
-            keyboard = InlineKeyboardMarkup(back_buttons)
-            
-            if update.callback_query:
-                await update.callback_query.edit_message_text(text, reply_markup=keyboard)
-            else:
-                await update.message.reply_text(text, reply_markup=keyboard)
-            return
-        
-        # Paginate products
-        products_page, total_pages = paginate_items(all_products, page, per_page=5)
-        
-        # Save pagination state
-        if subcategory and category:
-            state_key = f"subcategory_{category}_{subcategory}"
-            # Store the state_key in query field for proper back navigation
-            await db.save_pagination_state(user_id, state_key, state_key, page)
-        elif category:
-            state_key = f"category_{category}"
-            # Store category in query field for back navigation
-            await db.save_pagination_state(user_id, state_key, category, page)
-        else:
-            state_key = "catalog"
-            await db.save_pagination_state(user_id, state_key, "", page)
-        
-        # Create keyboard with product buttons
-        keyboard_buttons = []
-        
-        # Add product buttons
-        for product in products_page:
-            caption = product.get("caption", "No caption") or "No caption"
-            button_text = caption[:47] + "..." if len(caption) > 50 else caption
-            if not button_text.strip():
-                button_text = f"Product #{product['id']}"
-            
-            callback_data = f"product|{product['id']}"
-            keyboard_buttons.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
-        
-        # Add pagination controls
-        if total_pages > 1:
-            nav_buttons = []
-            
-            previous_text = await get_translated_string_async("button_previous_page", user_lang)
-            next_text = await get_translated_string_async("button_next_page", user_lang)
-            
-            if page > 1:
-                if subcategory and category:
-                    prev_data = f"subcategory|{category}|{subcategory}|{page - 1}"
-                elif category:
-                    prev_data = f"category|{category}|{page - 1}"
-                else:
-                    prev_data = f"page|catalog|{page - 1}"
-                nav_buttons.append(InlineKeyboardButton(previous_text, callback_data=prev_data))
-            
-            page_text = await get_translated_string_async("page_indicator", user_lang, page=page, total_pages=total_pages)
-            if page_text == "page_indicator":
-                page_text = f"Page {page}/{total_pages}"
-            nav_buttons.append(InlineKeyboardButton(page_text, callback_data="noop"))
-            
-            if page < total_pages:
-                if subcategory and category:
-                    next_data = f"subcategory|{category}|{subcategory}|{page + 1}"
-                elif category:
-                    next_data = f"category|{category}|{page + 1}"
-                else:
-                    next_data = f"page|catalog|{page + 1}"
-                nav_buttons.append(InlineKeyboardButton(next_text, callback_data=next_data))
-            
-            keyboard_buttons.append(nav_buttons)
+        # Count products (filtered by category and/or subcategory if specified) while the
+        # language is looked up and the title translated - only the current page is
+        # fetched from the database further down
+        total_count, (user_lang, title) = await asyncio.gather(
+            db.count_catalog_products(category, subcategory, EXCLUDED_FROM_ALL_PRODUCTS),
+            get_lang_and_title()
+        )
+    except aiosqlite.Error as e:
+        logger.error(f"Database error counting catalog products: {e}")
+        await _send_catalog_error(update, user_lang)
+        return
+    
+    # Build callback data and pagination state key once for this listing
+    if category and subcategory:
+        page_prefix = f"subcategory|{category}|{subcategory}"
+        back_data = f"browse_category|{category}"
+        state_key = f"subcategory_{category}_{subcategory}"
+        # Store the state_key in query field for proper back navigation
+        state_query = state_key
+    elif category:
+        page_prefix = f"category|{category}"
+        back_data = "categories"
+        state_key = f"category_{category}"
+        # Store category in query field for back navigation
+        state_query = category
+    else:
+        page_prefix = "page|catalog"
+        back_data = "categories"
+        state_key = "catalog"
+        state_query = ""
+    refresh_data = f"{page_prefix}|1" if category else "menu|1"
+    
+    if not total_count:
+        context_str = 'subcategory' if subcategory else 'category' if category else 'catalog'
+        text = await get_translated_string_async("no_products_in_category", user_lang, context=context_str)
+        if text == "no_products_in_category":
+            text = f"📭 No products in this {context_str}."
         
-        # Add appropriate back button
-        back_to_subcats_text = await get_translated_string_async("button_back_to_subcategories", user_lang)
-        back_to_cats_text = await get_translated_string_async("button_back_to_categories", user_lang)
+        # Back and refresh buttons based on context
+        keyboard = await _get_empty_listing_keyboard(user_lang, back_data, refresh_data)
         
-        if subcategory and category:
-            keyboard_buttons.append([InlineKeyboardButton(back_to_subcats_text, callback_data=f"browse_category|{category}")])
+        if update.callback_query:
+            await update.callback_query.edit_message_text(text, reply_markup=keyboard)
         else:
-            keyboard_buttons.append([InlineKeyboardButton(back_to_cats_text, callback_data="categories")])
+            await update.message.reply_text(text, reply_markup=keyboard)
+        return
+    
+    # Paginate products in SQL - only the rows for this page are fetched
+    requested_page = page
+    page, total_pages = clamp_page(total_count, page, per_page=CATALOG_PAGE_SIZE)
+    
+    # Stale "Next" press past the last page while that last page is already on screen
+    # (same page count): the query is already answered, so skip the fetch and the
+    # redundant edit. If the catalog shrank, re-render so the page count is current.
+    if requested_page > total_pages and _is_listing_on_page(update, title, page, total_pages):
+        logger.debug(f"Ignoring out-of-range page {requested_page}/{total_pages} for {state_key}")
+        return
+    
+    try:
+        # Fetch the page while the navigation labels are translated
+        products_page, (previous_text, next_text, page_text) = await asyncio.gather(
+            db.get_catalog_products(
+                category, subcategory, EXCLUDED_FROM_ALL_PRODUCTS,
+                limit=CATALOG_PAGE_SIZE, offset=(page - 1) * CATALOG_PAGE_SIZE
+            ),
+            get_translated_strings_async(
+                ["button_previous_page", "button_next_page", "page_indicator"],
+                user_lang,
+                format_kwargs={"page_indicator": {"page": page, "total_pages": total_pages}}
+            )
+        )
+    except aiosqlite.Error as e:
+        logger.error(f"Database error fetching catalog page: {e}")
+        await _send_catalog_error(update, user_lang)
+        return
+    
+    # Save pagination state (buffered in memory, flushed in the background)
+    await db.save_pagination_state(user_id, state_key, state_query, page)
+    
+    # Create keyboard with product buttons
+    keyboard_buttons = create_product_buttons(products_page)
+    
+    # Status line needs the number of products actually on this page
+    showing_text = await get_translated_string_async(
+        "showing_products", user_lang, current=len(products_page), total=total_count
+    )
+    
+    # Add pagination controls
+    if total_pages > 1:
+        nav_buttons = []
         
-        keyboard = InlineKeyboardMarkup(keyboard_buttons)
+        if page > 1:
+            nav_buttons.append(InlineKeyboardButton(previous_text, callback_data=f"{page_prefix}|{page - 1}"))
         
-        showing_text = await get_translated_string_async("showing_products", user_lang, current=len(products_page), total=len(all_products))
-        if showing_text == "showing_products":
-            showing_text = f"Showing {len(products_page)} of {len(all_products)} products"
+        if page_text == "page_indicator":
+            page_text = f"Page {page}/{total_pages}"
+        nav_buttons.append(InlineKeyboardButton(page_text, callback_data="noop"))
         
-        text = f"{title}\n\n{showing_text}"
+        if page < total_pages:
+            nav_buttons.append(InlineKeyboardButton(next_text, callback_data=f"{page_prefix}|{page + 1}"))
         
-        if update.callback_query:
-            # Check if the message is a media message (can't edit media messages)
-            message = update.callback_query.message
-            if message.photo or message.video or message.document or message.animation or message.audio:
-                # Don't delete media message - send new message to preserve product view
-                await context.bot.send_message(
-                    chat_id=update.effective_chat.id,
-                    text=text,
-                    reply_markup=keyboard,
-                    parse_mode="Markdown"
-                )
-            else:
-                # Regular text message, can be edited
-                await update.callback_query.edit_message_text(
-                    text,
-                    reply_markup=keyboard,
-                    parse_mode="Markdown"
-                )
-        else:
-            await update.message.reply_text(
-                text,
-                reply_markup=keyboard,
-                parse_mode="Markdown"
-            )
-            
-    except Exception as e:
-        logger.error(f"Error showing catalog page: {e}")
-        user_lang = await db.get_user_language(update.effective_user.id)
-        error_text = await get_translated_string_async("error_occurred", user_lang)
-        if update.callback_query:
-            await update.callback_query.answer(error_text, show_alert=True)
-        else:
-            await update.message.reply_text(error_text)
+        keyboard_buttons.append(nav_buttons)
+    
+    # Add appropriate back button
+    keyboard_buttons.append([await _get_back_button(user_lang, back_data)])
+    
+    keyboard = InlineKeyboardMarkup(keyboard_buttons)
+    
+    if showing_text == "showing_products":
+        showing_text = f"Showing {len(products_page)} of {total_count} products"
+    
+    text = f"{title}\n\n{showing_text}"
+    
+    await reply_or_edit(update, context, text, keyboard)
 
 
 async def handle_catalog_pagination(update: Update, context: ContextTypes.DEFAULT_TYPE, page: int, category: str = None, subcategory: str = None):
@@ -1,271 +1,419 @@
 """
 Product view handler.
 """
+import asyncio
+import functools
 import logging
 import json
+import re
+import aiosqlite
+from typing import Dict, List, Optional, Sequence, Tuple
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto, InputMediaVideo
 from telegram.ext import ContextTypes
-from database import Database
+from telegram.error import BadRequest, NetworkError
+from database import get_db
 from utils.helpers import send_media_message, is_admin, get_bot_specific_file_id
 from utils.pagination import paginate_items
-from utils.categories import format_category_info
-from translations.translator import translate_text_async, get_translated_string_async
+from utils.categories import format_category_info_checked
+from translations.translator import translate_text_async, get_translated_string_checked_async
 
 logger = logging.getLogger(__name__)
-db = Database()
+db = get_db()
 
+# Product view texts that only depend on a few fixed inputs - built once per combination.
+# English fallbacks from a failed translation aren't remembered, so they're retried next view.
+_CATEGORY_INFO_CACHE: Dict[Tuple[Optional[str], Optional[str], str], str] = {}
+_DM_MESSAGE_CACHE: Dict[Tuple[str, str], str] = {}
 
-async def show_product(update: Update, context: ContextTypes.DEFAULT_TYPE, product_id: int):
-    """Show a single product with media and details."""
+# Listing pagination states: subcategory_{category}_{subcategory} or category_{category}
+# (a subcategory state without both parts falls back to the menu)
+_LISTING_STATE_RE = re.compile(
+    r"subcategory_(?P<parent>[^_]*)_(?P<subcategory>.*)|category_(?P<category>.*)",
+    re.DOTALL
+)
+
+# Media group files resolved at once per product view (each may forward a message via the Bot API)
+FILE_ID_RESOLVE_CONCURRENCY = 8
+
+
+def _get_category_info(category: Optional[str], subcategory: Optional[str], lang: str) -> str:
+    """Get the translated category line of a product view."""
+    cache_key = (category, subcategory, lang)
+    category_info = _CATEGORY_INFO_CACHE.get(cache_key)
+    if category_info is None:
+        category_info, translated = format_category_info_checked(category, subcategory, lang)
+        if translated:
+            _CATEGORY_INFO_CACHE[cache_key] = category_info
+    return category_info
+
+
+async def _get_dm_message(lang: str, order_contact: str) -> str:
+    """Get the translated "DM to order" line shown under a product."""
+    cache_key = (lang, order_contact)
+    dm_message = _DM_MESSAGE_CACHE.get(cache_key)
+    if dm_message is None:
+        dm_message, translated = await get_translated_string_checked_async("dm_to_order", lang, contact=order_contact)
+        if translated:
+            _DM_MESSAGE_CACHE[cache_key] = dm_message
+    return dm_message
+
+
+# A run of at least two letters (any script) - text without one has nothing to translate
+_TRANSLATABLE_TEXT_RE = re.compile(r"[^\W\d_]{2,}")
+
+
+def _needs_bot_specific_ids(product: dict, context: ContextTypes.DEFAULT_TYPE) -> bool:
+    """
+    Check whether a product's media was posted by a different bot than the current one.
+    Product bot usernames are stored lowercased, so only the current bot's name needs normalizing.
+    """
+    product_bot = product.get("bot_username")
+    current_bot = context.bot.username
+    # Handle None values for bot usernames
+    return product_bot is None or current_bot is None or product_bot != current_bot.lower()
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_json_list(json_text: str):
+    """
+    Parse a product's stored JSON list (media group file IDs or message IDs).
+    Results are memoised per JSON text and returned as tuples so the cached value can't be mutated.
+    
+    Args:
+        json_text: JSON text from the products table
+    
+    Returns:
+        Parsed list as a tuple (nested lists as tuples), or the parsed value if it isn't a list
+    """
+    value = json.loads(json_text)
+    if not isinstance(value, list):
+        return value
+    return tuple(tuple(item) if isinstance(item, list) else item for item in value)
+
+
+@functools.lru_cache(maxsize=4096)
+def _get_listing_back_callback(state_type: str, page: int) -> Optional[str]:
+    """
+    Get the back button callback for a catalog, category or subcategory listing state (memoised).
+    
+    Args:
+        state_type: Pagination state type
+        page: Page the user was on
+    
+    Returns:
+        Callback data returning to that listing page, or None if the state isn't a listing
+    """
+    # Category and subcategory listings carry their names in state_type
+    state_match = _LISTING_STATE_RE.fullmatch(state_type)
+    
+    # Check if user was browsing a subcategory
+    if state_match and state_match.group("subcategory") is not None:
+        return f"subcategory|{state_match.group('parent')}|{state_match.group('subcategory')}|{page}"
+    # Check if user was browsing a category
+    if state_match:
+        return f"category|{state_match.group('category')}|{page}"
+    if state_type == "catalog":
+        # User was browsing all products
+        return f"menu|{page}"
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _get_product_keyboard(back_callback: str, product_id: int, admin: bool) -> InlineKeyboardMarkup:
+    """
+    Get the keyboard shown under a product (built once per combination).
+    
+    Args:
+        back_callback: Callback data of the back button
+        product_id: Product ID
+        admin: Whether to add the admin buttons
+    
+    Returns:
+        InlineKeyboardMarkup for the product view
+    """
+    keyboard_buttons = [
+        [InlineKeyboardButton("🔙 Back to results", callback_data=back_callback)]
+    ]
+    
+    # Add delete and recategorize buttons for admins
+    if admin:
+        keyboard_buttons.append([
+            InlineKeyboardButton(
+                "🔄 Recategorize",
+                callback_data=f"recategorize|{product_id}"
+            ),
+            InlineKeyboardButton(
+                "🗑 Delete this product",
+                callback_data=f"delete|{product_id}"
+            )
+        ])
+    
+    return InlineKeyboardMarkup(keyboard_buttons)
+
+
+async def _translate_caption(caption: str, lang: str) -> str:
+    """Translate a product caption for non-English users, keeping the original on failure."""
+    if not lang or lang in ["en", "en-US"]:
+        return caption
+    # Captions without any words (prices, emoji, codes) read the same in every language
+    if not _TRANSLATABLE_TEXT_RE.search(caption):
+        return caption
     try:
-        product = await db.get_product(product_id)
-        
-        if not product:
-            await update.callback_query.answer(
-                "❌ Product not found.",
-                show_alert=True
+        return await translate_text_async(caption, lang)
+    except Exception as e:
+        logger.error(f"Error translating caption: {e}")
+        # Keep original caption if translation fails
+        return caption
+
+
+async def _resolve_bot_specific_file_ids(
+    context: ContextTypes.DEFAULT_TYPE,
+    product_id: int,
+    chat_id: int,
+    message_ids: Sequence[int],
+    files: List[Tuple[str, str]]
+) -> List[str]:
+    """
+    Get bot-specific file IDs for all files of a media group concurrently.
+    
+    Args:
+        context: Bot context
+        product_id: Product ID (for logging)
+        chat_id: Source chat of the media group
+        message_ids: Source message ID per file
+        files: (original file ID, file type) per file
+    
+    Returns:
+        File ID to send per file - the bot-specific one if available, otherwise the original
+    """
+    # Files already resolved for this bot come from the persistent cache in one query
+    cached_file_ids = {}
+    if context.bot.username:
+        try:
+            cached_file_ids = await db.get_bot_file_ids(chat_id, message_ids[:len(files)], context.bot.username)
+        except Exception as e:
+            logger.warning(f"Could not load cached file IDs for product {product_id}: {e}")
+    
+    semaphore = asyncio.Semaphore(FILE_ID_RESOLVE_CONCURRENCY)
+    
+    async def resolve(index: int, file_id: str, file_type: str) -> str:
+        if index in cached_file_ids:
+            return cached_file_ids[index]
+        # Verify we have a message ID for this file
+        if index >= len(message_ids):
+            # Message ID missing for this file - log warning and use original
+            logger.warning(
+                f"Message ID missing for file {index} in product {product_id} "
+                f"(have {len(message_ids)} IDs, need {len(files)})"
             )
-            return
-        
-        # Get user's pagination state to determine back button behavior
-        user_id = update.effective_user.id
-        
-        # Get the most recent pagination state to determine where user was browsing
-        latest_state = await db.get_latest_pagination_state(user_id)
+            return file_id
+        async with semaphore:
+            bot_specific_id = await get_bot_specific_file_id(
+                context,
+                chat_id,
+                message_ids[index],
+                file_type,
+                file_index=index
+            )
+        # Use bot-specific ID if available, otherwise fall back to original
+        return bot_specific_id or file_id
+    
+    results = await asyncio.gather(
+        *(resolve(index, file_id, file_type) for index, (file_id, file_type) in enumerate(files)),
+        return_exceptions=True
+    )
+    
+    file_ids = []
+    for index, result in enumerate(results):
+        if isinstance(result, Exception):
+            logger.warning(f"Could not get bot-specific file ID {index} for product {product_id}: {result}")
+            result = files[index][0]
+        file_ids.append(result)
+    return file_ids
+
+
+async def show_product(update: Update, context: ContextTypes.DEFAULT_TYPE, product_id: int):
+    """
+    Show a single product with media and details.
+    
+    The callback query is answered by callback_query_handler before this runs.
+    Database errors are reported to the user here; other errors propagate to
+    the application's error handler.
+    """
+    user_id = update.effective_user.id
+    
+    # Load the product together with everything else the view needs
+    try:
+        # (the most recent pagination state determines where the user was browsing)
+        (product, latest_state), user_lang, order_contact = await asyncio.gather(
+            db.get_product_with_latest_state(product_id, user_id),
+            db.get_user_language(user_id),
+            db.get_order_contact()
+        )
+    except aiosqlite.Error as e:
+        logger.error(f"Database error loading product {product_id}: {e}")
+        await update.effective_message.reply_text("❌ An error occurred while loading the product.")
+        return
+    
+    if not product:
+        await update.effective_message.reply_text("❌ Product not found.")
+        return
+    
+    # Determine appropriate back button based on context
+    back_callback = "menu|1"  # Default fallback
+    
+    if latest_state and "state_type" in latest_state and "page" in latest_state:
+        state_type = latest_state["state_type"]
+        page = latest_state["page"]
+        query = latest_state.get("query", "")
         
-        # Determine appropriate back button based on context
-        back_callback = "menu|1"  # Default fallback
+        # Catalog, category and subcategory listings map straight to their page
+        listing_callback = _get_listing_back_callback(state_type, page)
         
-        if latest_state and "state_type" in latest_state and "page" in latest_state:
-            state_type = latest_state["state_type"]
-            page = latest_state["page"]
-            query = latest_state.get("query", "")
-            
-            # Check if user was browsing a subcategory
-            if state_type.startswith("subcategory_"):
-                # Extract category and subcategory from state_type
-                # Format: subcategory_{category}_{subcategory}
-                parts = state_type.split("_", 2)  # Split into at most 3 parts
-                if len(parts) >= 3:
-                    category = parts[1]
-                    subcategory = parts[2]
-                    back_callback = f"subcategory|{category}|{subcategory}|{page}"
-                else:
-                    # Fallback if format is unexpected
-                    back_callback = "menu|1"
-            # Check if user was browsing a category
-            elif state_type.startswith("category_"):
-                # Extract category from state_type: category_{categoryname}
-                parts = state_type.split("_", 1)
-                if len(parts) >= 2:
-                    category = parts[1]
-                    back_callback = f"category|{category}|{page}"
-                else:
-                    # Fallback
-                    back_callback = "menu|1"
-            elif state_type == "search":
-                # User was searching - use the query from the state
-                if query:
-                    # Replace pipe characters to avoid breaking callback data
-                    safe_query = query.replace("|", "_PIPE_")
-                    # Truncate if needed (Telegram callback_data limit is 64 bytes)
-                    max_query_len = 64 - 16
-                    if len(safe_query) > max_query_len:
-                        safe_query = safe_query[:max_query_len]
-                    back_callback = f"page|search|{safe_query}|{page}"
-                else:
-                    back_callback = "menu|1"
-            elif state_type == "catalog":
-                # User was browsing all products
-                back_callback = f"menu|{page}"
+        if listing_callback is not None:
+            back_callback = listing_callback
+        elif state_type == "search":
+            # User was searching - use the query from the state
+            if query:
+                # Short token instead of the query keeps callback data within Telegram's 64 bytes
+                query_token = await db.get_search_token(query)
+                back_callback = f"page|search|{query_token}|{page}"
             else:
-                # Default fallback
                 back_callback = "menu|1"
         else:
-            # No pagination state found - user likely came from notification
-            # Use product's category/subcategory to determine back button
-            product_category = product.get("category")
-            product_subcategory = product.get("subcategory")
-            
-            if product_category and product_subcategory:
-                # Product has both category and subcategory - go to subcategory view
-                back_callback = f"subcategory|{product_category}|{product_subcategory}|1"
-            elif product_category:
-                # Product has only category - go to category view
-                back_callback = f"category|{product_category}|1"
-            # else: keep default "menu|1"
-        
-        # Create keyboard
-        keyboard_buttons = [
-            [InlineKeyboardButton("🔙 Back to results", callback_data=back_callback)]
-        ]
-        
-        # Add delete and recategorize buttons for admins
-        if is_admin(user_id):
-            keyboard_buttons.append([
-                InlineKeyboardButton(
-                    "🔄 Recategorize",
-                    callback_data=f"recategorize|{product_id}"
-                ),
-                InlineKeyboardButton(
-                    "🗑 Delete this product",
-                    callback_data=f"delete|{product_id}"
-                )
-            ])
-        
-        keyboard = InlineKeyboardMarkup(keyboard_buttons)
-        
-        # Get user's language preference
-        user_lang = await db.get_user_language(user_id)
-        
-        # Get caption and translate it
-        caption = product.get("caption") or "No description"
-        
-        # Translate caption if user language is not English
-        if user_lang and user_lang not in ["en", "en-US"]:
-            try:
-                caption = await translate_text_async(caption, user_lang)
-            except Exception as e:
-                logger.error(f"Error translating caption: {e}")
-                # Keep original caption if translation fails
-        
-        category_info = format_category_info(product.get("category"), product.get("subcategory"), user_lang)
-        
-        # Add category to caption
-        full_caption = f"{caption}\n\n📂 {category_info}"
-        
-        # Check if this is a media group (has additional files)
-        additional_file_ids = product.get("additional_file_ids")
+            # Default fallback
+            back_callback = "menu|1"
+    else:
+        # No pagination state found - user likely came from notification
+        # Use product's category/subcategory to determine back button
+        product_category = product.get("category")
+        product_subcategory = product.get("subcategory")
         
-        if additional_file_ids:
-            # This is a media group - send as album
-            try:
-                file_data = json.loads(additional_file_ids)
-                
-                # Check if we need bot-specific file ID resolution
-                product_bot = product.get("bot_username")
-                current_bot = context.bot.username
-                # Handle None values for bot usernames
-                needs_bot_specific_ids = (
-                    product_bot is None or 
-                    current_bot is None or 
-                    product_bot.lower() != current_bot.lower()
-                )
-                
+        if product_category and product_subcategory:
+            # Product has both category and subcategory - go to subcategory view
+            back_callback = f"subcategory|{product_category}|{product_subcategory}|1"
+        elif product_category:
+            # Product has only category - go to category view
+            back_callback = f"category|{product_category}|1"
+        # else: keep default "menu|1"
+    
+    # Create keyboard
+    keyboard = _get_product_keyboard(back_callback, product_id, is_admin(user_id))
+    
+    # Get caption and translate it
+    caption = product.get("caption") or "No description"
+    
+    # Translate caption if user language is not English (alongside the DM to order message)
+    caption, dm_message = await asyncio.gather(
+        _translate_caption(caption, user_lang),
+        _get_dm_message(user_lang, order_contact)
+    )
+    
+    category_info = _get_category_info(product.get("category"), product.get("subcategory"), user_lang)
+    
+    # Add category to caption
+    full_caption = f"{caption}\n\n📂 {category_info}"
+    
+    # Check if this is a media group (has additional files)
+    additional_file_ids = product.get("additional_file_ids")
+    
+    if additional_file_ids:
+        # This is a media group - send as album
+        try:
+            file_data = _parse_json_list(additional_file_ids)
+            
+            message_ids = []
+            use_bot_specific_ids = False
+            
+            # Same bot: the stored file IDs work as-is, so message IDs aren't needed at all
+            if _needs_bot_specific_ids(product, context):
                 # Parse additional message IDs if available
                 additional_message_ids_json = product.get("additional_message_ids")
-                message_ids = []
-                use_bot_specific_ids = False
                 
                 if additional_message_ids_json:
                     try:
-                        additional_msg_ids = json.loads(additional_message_ids_json)
+                        additional_msg_ids = _parse_json_list(additional_message_ids_json)
                         # Build complete message ID list: [first_message_id, ...additional_message_ids]
-                        message_ids = [product["message_id"]] + additional_msg_ids
-                        # Use bot-specific IDs if different bot OR no message IDs stored
-                        use_bot_specific_ids = needs_bot_specific_ids
+                        message_ids = [product["message_id"]] + list(additional_msg_ids)
+                        use_bot_specific_ids = True
                     except (json.JSONDecodeError, TypeError) as e:
                         logger.warning(f"Failed to parse additional_message_ids: {e}")
-                        use_bot_specific_ids = False
                 else:
-                    # No message IDs - need bot-specific resolution if different bot
-                    if needs_bot_specific_ids:
-                        # We need message IDs for bot-specific resolution
-                        # Estimate sequential message IDs (may not be accurate for all cases)
-                        logger.warning(
-                            f"Product {product_id} has no stored message IDs - estimating sequential IDs. "
-                            f"This may fail if messages weren't sent sequentially."
-                        )
-                        # Build message ID list from the first message ID with correct sequential numbering
-                        # message_ids[0] = base, message_ids[1] = base+1, message_ids[2] = base+2, etc.
-                        message_ids = [product["message_id"] + i for i in range(len(file_data) + 1)]
-                        use_bot_specific_ids = True
-                    else:
-                        use_bot_specific_ids = False
-                
-                # Prepare media list
-                media_list = []
-                non_group_media = []  # Media that can't be in a group (documents, animations, etc.)
-                
-                # Add first media
-                first_type = product["file_type"]
-                first_id = product["file_id"]
-                chat_id = product["chat_id"]
-                
-                # Try to get bot-specific file ID for the first media if message IDs are available
-                if use_bot_specific_ids:
-                    bot_specific_id = await get_bot_specific_file_id(
-                        context,
-                        chat_id,
-                        message_ids[0],
-                        first_type,
-                        file_index=0
+                    # No message IDs - estimate sequential message IDs (may not be accurate for all cases)
+                    logger.warning(
+                        f"Product {product_id} has no stored message IDs - estimating sequential IDs. "
+                        f"This may fail if messages weren't sent sequentially."
                     )
-                    # Use bot-specific ID if available, otherwise fall back to original
-                    first_id = bot_specific_id or first_id
-                
-                # Check if first media can be in a media group
-                if first_type == "photo":
-                    media_list.append(InputMediaPhoto(media=first_id, caption=full_caption))
-                elif first_type == "video":
-                    media_list.append(InputMediaVideo(media=first_id, caption=full_caption))
+                    # Sequential message IDs from the first message ID (a range - nothing to materialize)
+                    # message_ids[0] = base, message_ids[1] = base+1, message_ids[2] = base+2, etc.
+                    message_ids = range(product["message_id"], product["message_id"] + len(file_data) + 1)
+                    use_bot_specific_ids = True
+            
+            # Prepare media list
+            media_list = []
+            non_group_media = []  # Media that can't be in a group (documents, animations, etc.)
+            
+            # All files of the group: first media, then the additional ones
+            chat_id = product["chat_id"]
+            files = [(product["file_id"], product["file_type"])] + [
+                (file_id, file_type) for file_id, file_type in file_data
+            ]
+            
+            # Get bot-specific file IDs for all files at once if message IDs are available
+            if use_bot_specific_ids:
+                file_ids = await _resolve_bot_specific_file_ids(context, product_id, chat_id, message_ids, files)
+            else:
+                file_ids = [file_id for file_id, _ in files]
+            
+            # Check if first media can be in a media group
+            first_id = file_ids[0]
+            first_type = files[0][1]
+            if first_type == "photo":
+                media_list.append(InputMediaPhoto(media=first_id, caption=full_caption))
+            elif first_type == "video":
+                media_list.append(InputMediaVideo(media=first_id, caption=full_caption))
+            else:
+                # First media is not photo/video, add to non-group media
+                # We'll send caption with this media
+                non_group_media.append((first_id, first_type, full_caption))
+            
+            # Add additional media
+            for file_id, (_, file_type) in zip(file_ids[1:], files[1:]):
+                # Add media to the list based on type
+                # Telegram media groups only support photos and videos
+                # Other types will be sent as separate messages
+                if file_type == "photo":
+                    media_list.append(InputMediaPhoto(media=file_id))
+                elif file_type == "video":
+                    media_list.append(InputMediaVideo(media=file_id))
                 else:
-                    # First media is not photo/video, add to non-group media
-                    # We'll send caption with this media
-                    non_group_media.append((first_id, first_type, full_caption))
-                
-                # Add additional media with bot-specific file IDs if available
-                for idx, (file_id, file_type) in enumerate(file_data, start=1):
-                    if use_bot_specific_ids:
-                        # Verify we have a message ID for this file
-                        if idx < len(message_ids):
-                            # Get the corresponding message ID
-                            msg_id = message_ids[idx]
-                            
-                            # Try to get bot-specific file ID
-                            bot_specific_id = await get_bot_specific_file_id(
-                                context,
-                                chat_id,
-                                msg_id,
-                                file_type,
-                                file_index=idx
-                            )
-                            
-                            # Use bot-specific ID if available, otherwise fall back to original
-                            file_id = bot_specific_id or file_id
-                        else:
-                            # Message ID missing for this file - log warning and use original
-                            logger.warning(
-                                f"Message ID missing for file {idx} in product {product_id} "
-                                f"(have {len(message_ids)} IDs, need {len(file_data)+1})"
-                            )
-                    
-                    # Add media to the list based on type
-                    # Telegram media groups only support photos and videos
-                    # Other types will be sent as separate messages
-                    if file_type == "photo":
-                        media_list.append(InputMediaPhoto(media=file_id))
-                    elif file_type == "video":
-                        media_list.append(InputMediaVideo(media=file_id))
-                    else:
-                        # This media type can't be in a group, send separately
-                        non_group_media.append((file_id, file_type, None))
-                
-                # Now send the media
-                # 1. Send media group if we have photos/videos
-                if media_list:
-                    logger.info(f"Sending media group with {len(media_list)} items for product {product_id}")
-                    await context.bot.send_media_group(
-                        chat_id=update.effective_chat.id,
-                        media=media_list
-                    )
-                
-                # 2. Send non-group media (documents, animations, etc.) separately
-                if non_group_media:
-                    logger.info(f"Sending {len(non_group_media)} non-group media items for product {product_id}")
-                    for idx, (file_id, file_type, caption) in enumerate(non_group_media):
-                        # Add caption to first non-group media only if it wasn't used in media group
-                        should_add_caption = idx == 0 and not media_list
+                    # This media type can't be in a group, send separately
+                    non_group_media.append((file_id, file_type, None))
+            
+            # Now send the media
+            # 1. Send media group if we have photos/videos
+            if media_list:
+                logger.info(f"Sending media group with {len(media_list)} items for product {product_id}")
+                await context.bot.send_media_group(
+                    chat_id=update.effective_chat.id,
+                    media=media_list
+                )
+            
+        except (ValueError, TypeError, KeyError, BadRequest, NetworkError) as e:
+            # Unparseable media group data or a rejected/failed album send
+            logger.error(f"Error sending media group: {e}")
+            # Fall back to single media
+        else:
+            # The album is out - from here on, failures must not fall back to
+            # the single media send, or the product would be shown twice
+            
+            # 2. Send non-group media (documents, animations, etc.) separately
+            if non_group_media:
+                logger.info(f"Sending {len(non_group_media)} non-group media items for product {product_id}")
+                for idx, (file_id, file_type, caption) in enumerate(non_group_media):
+                    # Add caption to first non-group media only if it wasn't used in media group
+                    should_add_caption = idx == 0 and not media_list
+                    try:
                         await send_media_message(
                             context,
                             update.effective_chat.id,
@@ -274,81 +422,52 @@ async def show_product(update: Update, context: ContextTypes.DEFAULT_TYPE, produ
                             caption=caption if should_add_caption else None,
                             reply_markup=None  # Don't add keyboard to each media
                         )
-                
-                # Get order contact
-                order_contact = await db.get_order_contact()
-                
-                # Get translated DM to order message
-                dm_message = await get_translated_string_async("dm_to_order", user_lang, contact=order_contact)
-                
-                # Send keyboard in a separate message
-                await context.bot.send_message(
-                    chat_id=update.effective_chat.id,
-                    text=dm_message,
-                    reply_markup=keyboard
-                )
-                
-                await update.callback_query.answer()
-                return
-                
-            except Exception as e:
-                logger.error(f"Error sending media group: {e}")
-                # Fall back to single media
-        
-        # Send single media with caption
-        # Check if we need bot-specific file ID
-        product_bot = product.get("bot_username")
-        current_bot = context.bot.username
-        file_id_to_use = product["file_id"]
-        
-        # Handle None values for bot usernames
-        if (product_bot is None or 
-            current_bot is None or 
-            product_bot.lower() != current_bot.lower()):
-            # Try to get bot-specific file ID for single media
-            bot_specific_id = await get_bot_specific_file_id(
-                context,
-                product["chat_id"],
-                product["message_id"],
-                product["file_type"],
-                file_index=0
+                    except (BadRequest, NetworkError) as e:
+                        # Skip this file but still send the rest and the keyboard
+                        logger.error(f"Error sending non-group media {idx} for product {product_id}: {e}")
+            
+            # Send keyboard in a separate message
+            await context.bot.send_message(
+                chat_id=update.effective_chat.id,
+                text=dm_message,
+                reply_markup=keyboard
             )
-            if bot_specific_id:
-                file_id_to_use = bot_specific_id
-                logger.debug(f"Using bot-specific file ID for product {product_id}")
-            else:
-                logger.warning(f"Could not get bot-specific file ID for product {product_id}, using original")
-        
-        await send_media_message(
+            return
+    
+    # Send single media with caption
+    file_id_to_use = product["file_id"]
+    
+    # Check if we need bot-specific file ID
+    if _needs_bot_specific_ids(product, context):
+        # Try to get bot-specific file ID for single media
+        bot_specific_id = await get_bot_specific_file_id(
             context,
-            update.effective_chat.id,
-            file_id_to_use,
+            product["chat_id"],
+            product["message_id"],
             product["file_type"],
-            caption=full_caption,
-            reply_markup=None  # Don't add keyboard to media message
-        )
-        
-        # Get order contact
-        order_contact = await db.get_order_contact()
-        
-        # Get translated DM to order message
-        dm_message = await get_translated_string_async("dm_to_order", user_lang, contact=order_contact)
-        
-        # Send DM message with keyboard separately for consistency
-        await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text=dm_message,
-            reply_markup=keyboard
-        )
-        
-        await update.callback_query.answer()
-        
-    except Exception as e:
-        logger.error(f"Error showing product: {e}")
-        await update.callback_query.answer(
-            "❌ An error occurred while loading the product.",
-            show_alert=True
+            file_index=0
         )
+        if bot_specific_id:
+            file_id_to_use = bot_specific_id
+            logger.debug(f"Using bot-specific file ID for product {product_id}")
+        else:
+            logger.warning(f"Could not get bot-specific file ID for product {product_id}, using original")
+    
+    await send_media_message(
+        context,
+        update.effective_chat.id,
+        file_id_to_use,
+        product["file_type"],
+        caption=full_caption,
+        reply_markup=None  # Don't add keyboard to media message
+    )
+    
+    # Send DM message with keyboard separately for consistency
+    await context.bot.send_message(
+        chat_id=update.effective_chat.id,
+        text=dm_message,
+        reply_markup=keyboard
+    )
 
 
 async def handle_product_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -2,15 +2,55 @@
 Search handlers.
 """
 import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, MessageHandler, filters
-from database import Database
+from database import get_db
 from utils.pagination import create_pagination_keyboard, paginate_items
+from utils.reply import reply_or_edit
 from utils.fuzzy_search import fuzzy_search_products
 from translations.translator import get_translated_string_async
+from translations.language_config import DEFAULT_LANGUAGE
 
 logger = logging.getLogger(__name__)
-db = Database()
+db = get_db()
+
+# Fuzzy search matches by query, least recently used first. Entries are only valid
+# for the product list they were scored against, so result page clicks just slice.
+SEARCH_RESULTS_CACHE_MAX_SIZE = 256
+_SEARCH_RESULTS_CACHE: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+_search_results_products: Optional[List[Dict[str, Any]]] = None
+
+
+def _search_products(all_products: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
+    """
+    Fuzzy search the catalog, reusing the matches from an earlier search for the same query.
+    
+    Args:
+        all_products: Product list from db.get_all_products_for_search()
+        query: Search query
+    
+    Returns:
+        Matching products, best first
+    """
+    global _search_results_products
+    
+    # A new product list (catalog changed or cache expired) invalidates all matches
+    if all_products is not _search_results_products:
+        _SEARCH_RESULTS_CACHE.clear()
+        _search_results_products = all_products
+    
+    matched_products = _SEARCH_RESULTS_CACHE.get(query)
+    if matched_products is not None:
+        _SEARCH_RESULTS_CACHE.move_to_end(query)
+        return matched_products
+    
+    matched_products = fuzzy_search_products(all_products, query, score_cutoff=75)
+    _SEARCH_RESULTS_CACHE[query] = matched_products
+    if len(_SEARCH_RESULTS_CACHE) > SEARCH_RESULTS_CACHE_MAX_SIZE:
+        _SEARCH_RESULTS_CACHE.popitem(last=False)
+    return matched_products
 
 
 async def handle_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -36,7 +76,7 @@ async def handle_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         
         # Perform fuzzy search
-        matched_products = fuzzy_search_products(all_products, query, score_cutoff=75)
+        matched_products = _search_products(all_products, query)
         
         if not matched_products:
             no_products_found_text = await get_translated_string_async("no_products_found", user_lang, query=query)
@@ -44,7 +84,7 @@ async def handle_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         
         # Show first page of results
-        await show_search_results(update, context, query, matched_products, page=1)
+        await show_search_results(update, context, query, matched_products, page=1, user_lang=user_lang)
         
     except Exception as e:
         logger.error(f"Error handling search: {e}")
@@ -57,13 +97,15 @@ async def show_search_results(
     context: ContextTypes.DEFAULT_TYPE,
     query: str,
     matched_products: list,
-    page: int = 1
+    page: int = 1,
+    user_lang: Optional[str] = None
 ):
     """Show search results with pagination."""
     try:
-        # Get user's language preference
+        # Get user's language preference (unless the caller already has it)
         user_id = update.effective_user.id
-        user_lang = await db.get_user_language(user_id)
+        if user_lang is None:
+            user_lang = await db.get_user_language(user_id)
         
         # Paginate results
         products_page, total_pages = paginate_items(matched_products, page, per_page=5)
@@ -72,51 +114,25 @@ async def show_search_results(
         await db.save_pagination_state(user_id, "search", query, page)
         await db.save_last_search(user_id, query, page)
         
-        # Create keyboard (use safe query for callback data)
-        safe_query = query.replace("|", "_PIPE_")
+        # Create keyboard (callback data carries a short token for the query)
+        query_token = await db.get_search_token(query)
         keyboard = create_pagination_keyboard(
             products_page,
             page,
             total_pages,
             "search",
-            query=safe_query
+            query=query_token
         )
         
         # Use translated search results text
         text = await get_translated_string_async("search_results", user_lang, count=len(matched_products), query=query)
         text += f"\nShowing {len(products_page)} on this page"
         
-        if update.callback_query:
-            # Check if the message is a media message (can't edit media messages)
-            message = update.callback_query.message
-            if message.photo or message.video or message.document or message.animation or message.audio:
-                # Don't delete media message - send new message to preserve product view
-                await context.bot.send_message(
-                    chat_id=update.effective_chat.id,
-                    text=text,
-                    reply_markup=keyboard,
-                    parse_mode="Markdown"
-                )
-            else:
-                # Regular text message, can be edited
-                await update.callback_query.edit_message_text(
-                    text,
-                    reply_markup=keyboard,
-                    parse_mode="Markdown"
-                )
-        else:
-            await update.message.reply_text(
-                text,
-                reply_markup=keyboard,
-                parse_mode="Markdown"
-            )
+        await reply_or_edit(update, context, text, keyboard)
             
     except Exception as e:
         logger.error(f"Error showing search results: {e}")
-        # Get user's language preference for error message
-        user_id = update.effective_user.id
-        user_lang = await db.get_user_language(user_id)
-        error_text = await get_translated_string_async("error_occurred", user_lang)
+        error_text = await get_translated_string_async("error_occurred", user_lang or DEFAULT_LANGUAGE)
         if update.callback_query:
             await update.callback_query.answer(error_text, show_alert=True)
         else:
@@ -129,14 +145,27 @@ async def handle_search_pagination(
     query: str,
     page: int
 ):
-    """Handle search pagination callback."""
+    """
+    Handle search pagination callback (query is a search token, or the query itself for older buttons).
+    
+    The callback query is not answered upfront for search pages, so every path answers it here.
+    """
     try:
-        # Restore pipe characters in query
-        original_query = query.replace("_PIPE_", "|")
+        original_query = await db.get_search_query(query)
+        if original_query is None:
+            if db.is_search_token(query):
+                # The token was cleaned up - don't search for the token itself
+                await update.callback_query.answer(
+                    "⌛ This search has expired. Please search again.",
+                    show_alert=True
+                )
+                return
+            # Older buttons carry the query itself - restore pipe characters
+            original_query = query.replace("_PIPE_", "|")
         
-        # Get all products and re-run search
+        # Get all products and re-run search (usually served from the results cache)
         all_products = await db.get_all_products_for_search()
-        matched_products = fuzzy_search_products(all_products, original_query, score_cutoff=75)
+        matched_products = _search_products(all_products, original_query)
         
         if not matched_products:
             await update.callback_query.answer(
@@ -145,6 +174,7 @@ async def handle_search_pagination(
             )
             return
         
+        await update.callback_query.answer()
         await show_search_results(update, context, original_query, matched_products, page)
         
     except Exception as e:
@@ -1,28 +1,77 @@
 """
 Start command handler.
 """
+import asyncio
 import logging
+from typing import Dict, Tuple
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from database import Database
-from translations.translator import get_translated_string_async
+from database import get_db
+from translations.translator import get_translated_string_async, get_translated_strings_async, get_translated_strings_checked_async
 from translations.language_config import LANGUAGE_DISPLAY, DEFAULT_LANGUAGE
 from utils.helpers import is_admin, get_user_display_name, ADMIN_COMMANDS_FALLBACK, escape_markdown_v1
 
 logger = logging.getLogger(__name__)
-db = Database()
+db = get_db()
+
+# First-start language selection keyboard, built once at import
+_START_LANGUAGE_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton(display_lang, callback_data=f"setlang_start|{lang_code}")]
+    for lang_code, display_lang in LANGUAGE_DISPLAY.items()
+])
+
+# Welcome keyboards per (language, is_subscribed) - only 2 per language exist
+_WELCOME_KEYBOARD_CACHE: Dict[Tuple[str, bool], InlineKeyboardMarkup] = {}
+
+
+async def get_welcome_keyboard(lang: str, is_subscribed: bool) -> InlineKeyboardMarkup:
+    """
+    Get the welcome screen keyboard in the given language (cached).
+    
+    Args:
+        lang: User's language code
+        is_subscribed: Whether the user receives notifications (otherwise a resubscribe button is added)
+    
+    Returns:
+        InlineKeyboardMarkup for the welcome message
+    """
+    cache_key = (lang, is_subscribed)
+    keyboard = _WELCOME_KEYBOARD_CACHE.get(cache_key)
+    if keyboard is not None:
+        return keyboard
+    
+    # Translate all button labels at once (resubscribe only for users who have unsubscribed)
+    keys = ["view_catalog", "change_language"]
+    if not is_subscribed:
+        keys.append("resubscribe_notifications")
+    labels, translated = await get_translated_strings_checked_async(keys, lang)
+    view_catalog_text, change_language_text = labels[0], labels[1]
+    keyboard_buttons = [
+        [InlineKeyboardButton(view_catalog_text, callback_data="categories")],
+        [InlineKeyboardButton(change_language_text, callback_data="open_language_settings")]
+    ]
+    
+    # Add resubscribe button only for users who have unsubscribed
+    if not is_subscribed:
+        resubscribe_text = labels[2]
+        keyboard_buttons.append(
+            [InlineKeyboardButton(resubscribe_text, callback_data="toggle_notifications")]
+        )
+    
+    keyboard = InlineKeyboardMarkup(keyboard_buttons)
+    # English fallback labels from a failed translation aren't remembered, so they're retried next time
+    if translated:
+        _WELCOME_KEYBOARD_CACHE[cache_key] = keyboard
+    return keyboard
 
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /start command."""
     user = update.effective_user
     
-    # Check if this is a new user (doesn't exist in database)
-    is_new_user = not await db.user_exists(user.id)
-    
-    # Track user
+    # Track user (and find out whether this is a new user in the same step)
     bot_username = context.bot.username if hasattr(context.bot, 'username') else None
-    await db.track_user(
+    is_new_user = await db.track_user(
         user_id=user.id,
         username=user.username,
         first_name=user.first_name,
@@ -46,15 +95,6 @@ async def show_language_selection(update: Update, context: ContextTypes.DEFAULT_
     # Get user's full display name - escaped for markdown
     display_name = get_user_display_name(user, escaped=True)
     
-    # Create language selection keyboard
-    keyboard_buttons = []
-    for lang_code, display_lang in LANGUAGE_DISPLAY.items():
-        keyboard_buttons.append([
-            InlineKeyboardButton(display_lang, callback_data=f"setlang_start|{lang_code}")
-        ])
-    
-    keyboard = InlineKeyboardMarkup(keyboard_buttons)
-    
     # Use English as default for initial message
     welcome_text = f"👋 Welcome, {display_name}!\n\n"
     welcome_text += "🌐 **Select Your Language / Choisissez votre langue / Wählen Sie Ihre Sprache**\n\n"
@@ -62,7 +102,7 @@ async def show_language_selection(update: Update, context: ContextTypes.DEFAULT_
     
     await update.message.reply_text(
         welcome_text,
-        reply_markup=keyboard,
+        reply_markup=_START_LANGUAGE_KEYBOARD,
         parse_mode="Markdown"
     )
     logger.info(f"New user {user.id} - showing language selection")
@@ -75,45 +115,37 @@ async def show_welcome_message(update: Update, context: ContextTypes.DEFAULT_TYP
     # Get user's full display name - escaped for markdown
     display_name = get_user_display_name(user, escaped=True)
     
-    # Get user's language preference
-    user_lang = await db.get_user_language(user.id)
-    
-    # Check if user is subscribed to notifications
-    is_subscribed = await db.is_user_subscribed(user.id)
-    
-    # Get order contact
-    order_contact = await db.get_order_contact()
+    # Get user's language preference, notification subscription and order contact together
+    user_lang, is_subscribed, order_contact = await asyncio.gather(
+        db.get_user_language(user.id),
+        db.is_user_subscribed(user.id),
+        db.get_order_contact()
+    )
     
-    # Get translated welcome message with contact - name and contact are already escaped
+    # Get translated welcome message with contact (plus admin info for admins) and keyboard
+    # - name and contact are already escaped
     escaped_contact = escape_markdown_v1(order_contact)
-    welcome_text = await get_translated_string_async("welcome_with_contact", user_lang, name=display_name, contact=escaped_contact)
+    user_is_admin = is_admin(user.id)
+    keys = ["welcome_with_contact", "admin_commands_info"] if user_is_admin else ["welcome_with_contact"]
+    translated, keyboard = await asyncio.gather(
+        get_translated_strings_async(
+            keys,
+            user_lang,
+            format_kwargs={"welcome_with_contact": {"name": display_name, "contact": escaped_contact}}
+        ),
+        get_welcome_keyboard(user_lang, is_subscribed)
+    )
+    welcome_text = translated[0]
     
     # Add admin command info for admins
-    if is_admin(user.id):
-        admin_info = await get_translated_string_async("admin_commands_info", user_lang)
+    if user_is_admin:
+        admin_info = translated[1]
         if admin_info != "admin_commands_info":  # Only add if translation exists
             welcome_text += f"\n\n{admin_info}"
         else:
             # Use fallback constant
             welcome_text += ADMIN_COMMANDS_FALLBACK
     
-    # Build keyboard based on subscription status
-    view_catalog_text = await get_translated_string_async("view_catalog", user_lang)
-    change_language_text = await get_translated_string_async("change_language", user_lang)
-    keyboard_buttons = [
-        [InlineKeyboardButton(view_catalog_text, callback_data="categories")],
-        [InlineKeyboardButton(change_language_text, callback_data="open_language_settings")]
-    ]
-    
-    # Add resubscribe button only for users who have unsubscribed
-    if not is_subscribed:
-        resubscribe_text = await get_translated_string_async("resubscribe_notifications", user_lang)
-        keyboard_buttons.append(
-            [InlineKeyboardButton(resubscribe_text, callback_data="toggle_notifications")]
-        )
-    
-    keyboard = InlineKeyboardMarkup(keyboard_buttons)
-    
     await update.message.reply_text(
         welcome_text,
         reply_markup=keyboard,
@@ -18,12 +18,12 @@ from telegram.ext import (
 from telegram.error import TelegramError, BadRequest
 
 from configs.config import Config, ConfigError
-from database import Database
-from handlers.start import start_command, subscribe_command, unsubscribe_command
+from database import get_db, close_read_connections, invalidate_category_counts_cache, prune_expired_caches, PAGINATION_FLUSH_INTERVAL_SECONDS
+from handlers.start import start_command, subscribe_command, unsubscribe_command, get_welcome_keyboard
 from handlers.menu import menu_command, show_catalog_page, handle_catalog_pagination
 from handlers.search import handle_search, show_search_results, handle_search_pagination
 from handlers.product_view import show_product, handle_product_callback
-from handlers.language import language_command, handle_language_callback
+from handlers.language import language_command, handle_language_callback, get_language_keyboard
 from handlers.admin import (
     delete_product, nuke_command, recategorize_command, 
     users_command, show_users_page, build_users_bot_selection_menu,
@@ -44,7 +44,10 @@ from utils.helpers import (
     escape_markdown_v1
 )
 from utils.categories import get_all_categories, get_category_display_name, get_subcategories, get_subcategory_display_name, CATEGORIES
-from utils.notifications import NotificationService
+from utils.notifications import NotificationService, notify_admins_for_categorization, is_primary_instance
+from utils.reply import is_media_message
+from utils.chat_dispatcher import ordered_per_chat
+from utils.rate_limit import TokenBucket
 
 # Configure logging with structured format for better visibility on Render
 logging.basicConfig(
@@ -59,7 +62,7 @@ logging.getLogger('telegram').setLevel(logging.INFO)
 logging.getLogger('httpx').setLevel(logging.WARNING)  # Reduce noise from HTTP library
 
 # Initialize database
-db = Database()
+db = get_db()
 
 # Rate limiting (simple in-memory store)
 user_last_message = {}
@@ -71,112 +74,12 @@ media_group_locks = {}  # Locks to prevent race conditions in media group proces
 
 # Callback query configuration
 LONG_RUNNING_CALLBACKS = ["broadcast_confirm_all"]  # Callbacks that should not answer query upfront to avoid timeouts
+SELF_ANSWERED_CALLBACK_PREFIXES = ("page|search|",)  # Callbacks that answer the query themselves (so they can show alerts)
+BROADCAST_STATUS_GRACE_SECONDS = 0.5  # Only show a "Broadcasting..." status if the broadcast takes longer than this
 
-
-def _is_primary_instance(context: ContextTypes.DEFAULT_TYPE) -> bool:
-    """
-    Check if this is the primary bot instance.
-    Only the primary bot (first token in BOT_TOKENS) should create notification queues.
-    
-    Args:
-        context: Telegram context with bot information
-        
-    Returns:
-        True if this is the primary instance, False otherwise
-    """
-    if not hasattr(context, 'bot') or not hasattr(context.bot, 'token'):
-        # If we can't determine, assume it's primary to maintain backward compatibility
-        logger.warning("Unable to determine bot instance, assuming primary")
-        return True
-    
-    current_token = context.bot.token
-    bot_tokens = Config.BOT_TOKENS
-    
-    # Validate BOT_TOKENS is a non-empty list
-    if not bot_tokens or not isinstance(bot_tokens, list) or len(bot_tokens) == 0:
-        # No tokens configured or invalid configuration, assume primary
-        return True
-    
-    # Primary bot is the first token in the list (index 0)
-    is_primary = current_token == bot_tokens[0]
-    
-    if not is_primary:
-        logger.debug(f"Skipping operation - not primary instance (bot token: ...{current_token[-5:]})")
-    
-    return is_primary
-
-
-
-async def notify_admins_for_categorization(context: ContextTypes.DEFAULT_TYPE, product_id: int):
-    """Send categorization request to all admins for a new product.
-    Only runs on the primary bot instance to avoid duplicate notifications.
-    """
-    # Check if this is the primary bot instance
-    if not _is_primary_instance(context):
-        logger.info(f"Skipping categorization notification for product {product_id} - not primary instance")
-        return
-    
-    try:
-        product = await db.get_product(product_id)
-        if not product:
-            return
-        
-        # Get all admin IDs
-        admin_ids = get_admin_ids()
-        
-        if not admin_ids:
-            logger.warning("No admin IDs configured. Product will remain uncategorized.")
-            return
-        
-        # Create category selection keyboard
-        keyboard_buttons = []
-        
-        for category in get_all_categories():
-            display_name = get_category_display_name(category)
-            keyboard_buttons.append([
-                InlineKeyboardButton(display_name, callback_data=f"setcat|{product_id}|{category}")
-            ])
-        
-        keyboard = InlineKeyboardMarkup(keyboard_buttons)
-        
-        # Prepare notification message
-        caption = product.get("caption", "No caption")
-        caption_preview = caption[:100] + "..." if len(caption) > 100 else caption
-        
-        message_text = (
-            f"🆕 **New Product Added - Needs Categorization**\n\n"
-            f"📝 Caption: {caption_preview}\n"
-            f"🆔 Product ID: {product_id}\n\n"
-            f"Please select a category:"
-        )
-        
-        # Get primary admin ID (use PRIMARY_ADMIN_ID if configured, otherwise use first admin)
-        from configs.config import Config
-        primary_admin = Config.PRIMARY_ADMIN_ID or (admin_ids[0] if admin_ids else None)
-
-        if not primary_admin:
-            logger.warning("No primary admin configured. Product will remain uncategorized.")
-            return
-
-        # Send notification only to primary admin
-        try:
-            await context.bot.send_message(
-                chat_id=primary_admin,
-                text=message_text,
-                parse_mode="Markdown",
-                reply_markup=keyboard
-            )
-            
-            logger.info(f"Sent categorization request to primary admin {primary_admin} for product {product_id}")
-            
-        except Exception as e:
-            logger.error(f"Failed to notify primary admin {primary_admin}: {e}")
-        
-        # Mark as pending categorization
-        await db.add_pending_categorization(product_id)
-        
-    except Exception as e:
-        logger.error(f"Error notifying admins for categorization: {e}")
+# Catalog navigation and language buttons are throttled per user (5/sec, bursts of 10)
+THROTTLED_CALLBACK_PREFIXES = ("menu|", "page|", "category|", "subcategory|", "browse_category|", "categories", "setlang|", "setlang_start|")
+callback_rate_limiter = TokenBucket(rate=5, capacity=10)
 
 
 async def process_media_group(media_group_id: str, chat_id: int, context: ContextTypes.DEFAULT_TYPE):
@@ -356,12 +259,18 @@ async def channel_post_handler(update: Update, context: ContextTypes.DEFAULT_TYP
         logger.error(f"Error handling channel post: {e}", exc_info=True)
 
 
+@ordered_per_chat
 async def callback_query_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle all callback queries (buttons)."""
     query = update.callback_query
+    user_id = update.effective_user.id
+    
+    # Drop button-mashing on navigation buttons before doing any work
+    if query.data and query.data.startswith(THROTTLED_CALLBACK_PREFIXES) and not callback_rate_limiter.allow(user_id):
+        await query.answer()
+        return
     
     # Check if user is blocked (except for admins)
-    user_id = update.effective_user.id
     if not is_admin(user_id):
         is_blocked = await db.is_user_blocked(user_id)
         if is_blocked:
@@ -375,7 +284,7 @@ async def callback_query_handler(update: Update, context: ContextTypes.DEFAULT_T
     
     # Don't answer callback query upfront for long-running operations
     # These callbacks will answer the query themselves to avoid timeout errors
-    if callback_data not in LONG_RUNNING_CALLBACKS:
+    if callback_data not in LONG_RUNNING_CALLBACKS and not callback_data.startswith(SELF_ANSWERED_CALLBACK_PREFIXES):
         await query.answer()  # Answer callback to prevent loading spinner
     
     # Handle language selection callbacks from /language command
@@ -391,18 +300,8 @@ async def callback_query_handler(update: Update, context: ContextTypes.DEFAULT_T
         # Get user's current language
         current_lang = await db.get_user_language(user_id)
         
-        # Create language selection keyboard
-        keyboard_buttons = []
-        for lang_code, display_name in LANGUAGE_DISPLAY.items():
-            # Add checkmark for current language
-            if lang_code == current_lang:
-                display_name = f"✓ {display_name}"
-            
-            keyboard_buttons.append([
-                InlineKeyboardButton(display_name, callback_data=f"setlang|{lang_code}")
-            ])
-        
-        keyboard = InlineKeyboardMarkup(keyboard_buttons)
+        # Get language selection keyboard (current language is marked)
+        keyboard = get_language_keyboard(current_lang)
         
         # Get translated message
         message_text = await get_translated_string_async("language_settings", current_lang)
@@ -417,7 +316,7 @@ async def callback_query_handler(update: Update, context: ContextTypes.DEFAULT_T
         
         # Check if we need to send new message or edit existing
         message = query.message
-        if message.photo or message.video or message.document or message.animation or message.audio:
+        if is_media_message(message):
             # Media message - send new text message
             await context.bot.send_message(
                 chat_id=update.effective_chat.id,
@@ -459,20 +358,7 @@ async def callback_query_handler(update: Update, context: ContextTypes.DEFAULT_T
                 escaped_contact = escape_markdown_v1(order_contact)
                 
                 welcome_text = await get_translated_string_async("welcome_with_contact", lang_code, name=display_name, contact=escaped_contact)
-                view_catalog_text = await get_translated_string_async("view_catalog", lang_code)
-                change_language_text = await get_translated_string_async("change_language", lang_code)
-                keyboard_buttons = [
-                    [InlineKeyboardButton(view_catalog_text, callback_data="categories")],
-                    [InlineKeyboardButton(change_language_text, callback_data="open_language_settings")]
-                ]
-                
-                if not is_subscribed:
-                    resubscribe_text = await get_translated_string_async("resubscribe_notifications", lang_code)
-                    keyboard_buttons.append(
-                        [InlineKeyboardButton(resubscribe_text, callback_data="toggle_notifications")]
-                    )
-                
-                keyboard = InlineKeyboardMarkup(keyboard_buttons)
+                keyboard = await get_welcome_keyboard(lang_code, is_subscribed)
                 
                 await context.bot.send_message(
                     chat_id=update.effective_chat.id,
@@ -542,22 +428,38 @@ async def callback_query_handler(update: Update, context: ContextTypes.DEFAULT_T
         # Answer query immediately to prevent timeout during long operation
         await query.answer()
         
-        # Send status message
-        await query.edit_message_text(
-            "📡 **Broadcasting message...**\n\n"
-            "Please wait while the message is queued and delivered to all users.",
-            parse_mode="Markdown"
-        )
+        # Consume the pending message so a repeated confirm tap can't broadcast twice
+        context.user_data.pop('broadcast_message', None)
         
         # Broadcast using notification service
         notification_service = NotificationService(db)
         
-        stats = await notification_service.broadcast_custom_message(
+        broadcast_task = asyncio.create_task(notification_service.broadcast_custom_message(
             context,
             message_text,
             exclude_blocked=True,
             admin_user_id=user_id
-        )
+        ))
+        
+        # Small broadcasts finish almost immediately - only show a progress
+        # status when the broadcast is still running after a short grace period
+        done, _ = await asyncio.wait({broadcast_task}, timeout=BROADCAST_STATUS_GRACE_SECONDS)
+        if not done:
+            await query.edit_message_text(
+                "📡 **Broadcasting message...**\n\n"
+                "Please wait while the message is queued and delivered to all users.",
+                parse_mode="Markdown"
+            )
+        
+        stats = await broadcast_task
+        
+        # Report failures and empty broadcasts instead of leaving a success/progress status
+        if stats.get('error'):
+            await query.edit_message_text(f"❌ Broadcast failed: {stats['error']}")
+        elif not stats.get('queued'):
+            await query.edit_message_text("📭 Broadcast not sent - no messages were queued.")
+        elif done:
+            await query.edit_message_text("✅ Broadcast finished.")
         
         # Note: The detailed summary is sent separately by the notification service
         # Failure count = permanent failures (blocked + not_found + unexpected_errors)
@@ -619,6 +521,7 @@ async def callback_query_handler(update: Update, context: ContextTypes.DEFAULT_T
                 try:
                     cursor = await conn.execute("DELETE FROM products")
                     await conn.commit()
+                    invalidate_category_counts_cache()
                     deleted_count = cursor.rowcount
                     logger.info(f"Deleted {deleted_count} products from database")
                 except Exception as e:
@@ -1538,6 +1441,7 @@ async def callback_query_handler(update: Update, context: ContextTypes.DEFAULT_T
         await query.answer("An error occurred", show_alert=True)
 
 
+@ordered_per_chat
 async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Handle regular messages from users.
@@ -1637,11 +1541,11 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def cleanup_task(context: ContextTypes.DEFAULT_TYPE):
-    """Periodic cleanup task for old pagination states.
+    """Periodic cleanup task for old pagination states, expired search tokens and user cache entries.
     Only runs on the primary bot instance to avoid duplicate cleanup.
     """
     # Check if this is the primary bot instance
-    if not _is_primary_instance(context):
+    if not is_primary_instance(context):
         logger.info("Cleanup task disabled - not primary instance")
         return
     
@@ -1650,10 +1554,30 @@ async def cleanup_task(context: ContextTypes.DEFAULT_TYPE):
             await asyncio.sleep(600)  # Run every 10 minutes
             await db.cleanup_old_pagination_states(minutes=10)
             logger.debug("Cleaned up old pagination states")
+            deleted_queries = await db.cleanup_old_search_queries()
+            if deleted_queries:
+                logger.debug(f"Deleted {deleted_queries} expired search tokens")
+            pruned = await prune_expired_caches()
+            if pruned:
+                logger.debug(f"Pruned {pruned} expired user cache entries")
         except Exception as e:
             logger.error(f"Error in cleanup task: {e}")
 
 
+async def pagination_flush_task():
+    """Periodically write buffered pagination states and last searches to the database."""
+    while True:
+        try:
+            await asyncio.sleep(PAGINATION_FLUSH_INTERVAL_SECONDS)
+            flushed = await db.flush_pagination_states()
+            if flushed:
+                logger.debug(f"Flushed {flushed} pagination states")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error flushing pagination states: {e}")
+
+
 async def post_init(application: Application):
     """Initialize database and start background tasks."""
     await db.init_db()
@@ -1668,6 +1592,18 @@ async def post_init(application: Application):
     
     # Start cleanup task
     asyncio.create_task(cleanup_task(application))
+    
+    # Start pagination state write-behind task
+    asyncio.create_task(pagination_flush_task())
+
+
+async def post_shutdown(application: Application):
+    """Persist buffered pagination states and release pooled database connections."""
+    try:
+        await db.flush_pagination_states()
+    except Exception as e:
+        logger.error(f"Error flushing pagination states on shutdown: {e}")
+    await close_read_connections()
 
 
 async def setup_bot_commands(bot):
@@ -1752,12 +1688,13 @@ def main():
     bot_token = Config.BOT_TOKEN
     
     # Create application
-    application = Application.builder().token(bot_token).post_init(post_init).build()
+    application = Application.builder().token(bot_token).post_init(post_init).post_shutdown(post_shutdown).build()
     
     # Register handlers
     application.add_handler(CommandHandler("start", start_command))
-    application.add_handler(CommandHandler("menu", menu_command))
-    application.add_handler(CommandHandler("language", language_command))
+    # Non-blocking handlers run concurrently across chats (ordered per chat by ordered_per_chat)
+    application.add_handler(CommandHandler("menu", menu_command, block=False))
+    application.add_handler(CommandHandler("language", language_command, block=False))
     application.add_handler(CommandHandler("nuke", nuke_command))
     application.add_handler(CommandHandler("recategorize", recategorize_command))
     application.add_handler(CommandHandler("users", users_command))
@@ -1796,13 +1733,14 @@ def main():
         logger.info(f"Channel monitoring enabled for: {channel_id or channel_username}")
     
     # Callback query handler (for inline buttons)
-    application.add_handler(CallbackQueryHandler(callback_query_handler))
+    application.add_handler(CallbackQueryHandler(callback_query_handler, block=False))
     
     # Message handler (for search queries)
     application.add_handler(
         MessageHandler(
             filters.TEXT & ~filters.COMMAND & filters.ChatType.PRIVATE,
-            message_handler
+            message_handler,
+            block=False
         )
     )
     
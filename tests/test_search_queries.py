@@ -0,0 +1,107 @@
+"""
+Tests for search query tokens and their expiry.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import aiosqlite
+import pytest
+
+import database
+from database import Database, SEARCH_QUERY_TTL_DAYS, close_read_connections
+
+
+@pytest.fixture(autouse=True)
+def clear_search_query_state():
+    """Start every test without tokens left in memory by another test."""
+    database._search_query_cache.clear()
+    database._search_query_written.clear()
+    database._pending_search_queries.clear()
+    yield
+    database._search_query_cache.clear()
+    database._search_query_written.clear()
+    database._pending_search_queries.clear()
+
+
+def run_with_db(tmp_path, test):
+    """Run an async test body against a fresh database."""
+    async def _run():
+        db = Database(db_path=str(tmp_path / "catalog.db"))
+        await db.init_db()
+        try:
+            await test(db)
+        finally:
+            await close_read_connections()
+    asyncio.run(_run())
+
+
+async def stored_tokens(db):
+    """Get the stored search tokens as token -> created_at."""
+    async with aiosqlite.connect(db.db_path) as conn:
+        async with conn.execute("SELECT token, created_at FROM search_queries") as cursor:
+            return {token: created_at for token, created_at in await cursor.fetchall()}
+
+
+def test_token_is_written_on_flush(tmp_path):
+    async def test(db):
+        token = await db.get_search_token("blue dream")
+        assert await stored_tokens(db) == {}
+        assert await db.get_search_query(token) == "blue dream"
+
+        await db.flush_pagination_states()
+        assert token in await stored_tokens(db)
+
+        # Forgotten in memory (e.g. after a restart), the token is read back from the database
+        database._search_query_cache.clear()
+        assert await db.get_search_query(token) == "blue dream"
+
+    run_with_db(tmp_path, test)
+
+
+def test_cleanup_deletes_only_expired_tokens(tmp_path):
+    async def test(db):
+        old_token = await db.get_search_token("old query")
+        new_token = await db.get_search_token("new query")
+        await db.flush_pagination_states()
+
+        expired_at = datetime.now() - timedelta(days=SEARCH_QUERY_TTL_DAYS + 1)
+        async with aiosqlite.connect(db.db_path) as conn:
+            await conn.execute("UPDATE search_queries SET created_at = ? WHERE token = ?", (expired_at, old_token))
+            await conn.commit()
+
+        assert await db.cleanup_old_search_queries() == 1
+        assert set(await stored_tokens(db)) == {new_token}
+
+        database._search_query_cache.clear()
+        assert await db.get_search_query(old_token) is None
+        assert await db.get_search_query(new_token) == "new query"
+
+    run_with_db(tmp_path, test)
+
+
+def test_token_in_use_is_rewritten_before_it_expires(tmp_path):
+    async def test(db):
+        token = await db.get_search_token("gelato")
+        await db.flush_pagination_states()
+
+        # Reused soon after: no new write
+        await db.get_search_token("gelato")
+        assert not database._pending_search_queries.get(db.db_path)
+
+        # Reused after half the TTL: written again with a fresh timestamp
+        query, _ = database._search_query_written[token]
+        database._search_query_written[token] = (query, datetime.now() - timedelta(days=SEARCH_QUERY_TTL_DAYS))
+        await db.get_search_token("gelato")
+        assert token in database._pending_search_queries[db.db_path]
+
+        await db.flush_pagination_states()
+        assert await db.cleanup_old_search_queries() == 0
+        assert token in await stored_tokens(db)
+
+    run_with_db(tmp_path, test)
+
+
+def test_tokens_are_told_apart_from_older_query_buttons():
+    assert Database.is_search_token(Database.search_query_token("blue dream"))
+    assert not Database.is_search_token("blue dream")
+    assert not Database.is_search_token("og_PIPE_kush")
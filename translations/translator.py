@@ -5,12 +5,14 @@ Provides automatic translation of bot messages based on user language preference
 import logging
 import asyncio
 import concurrent.futures
+import functools
 import re
-from typing import Optional, Tuple, Dict
+from typing import Optional, Tuple, Dict, List, Any
 from collections import OrderedDict
 from deep_translator import GoogleTranslator
 from translations.language_config import DEFAULT_LANGUAGE, is_valid_language
 from translations.strings import get_string as get_base_string
+from utils.single_flight import run_once
 
 logger = logging.getLogger(__name__)
 
@@ -120,6 +122,8 @@ class TranslationService:
             db: Optional Database instance for persistent caching
         """
         self._cache = BoundedCache(max_size=cache_size)
+        # Translated templates by "lang:key" - warm lookups skip building the text cache key
+        self._template_cache = BoundedCache(max_size=cache_size)
         self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
         self._db = db
     
@@ -139,25 +143,61 @@ class TranslationService:
         Returns:
             Translated text, or original text if translation fails
         """
+        translated, _ = await self.translate_checked(text, target_lang, source_lang)
+        return translated
+    
+    async def translate_checked(self, text: str, target_lang: str, source_lang: str = "en") -> Tuple[str, bool]:
+        """
+        Translate text, reporting whether the translation backend failed.
+        
+        Args:
+            text: Text to translate
+            target_lang: Target language code
+            source_lang: Source language code (default: 'en')
+        
+        Returns:
+            Tuple of (text, translated) - translated is False only when the original
+            text is returned because translation failed (worth retrying later)
+        """
         # Normalize language codes
         normalized_target = normalize_language_code(target_lang)
         normalized_source = normalize_language_code(source_lang)
         
         # No translation needed if target is same as source
         if normalized_target == normalized_source:
-            return text
+            return text, True
         
         # Validate language code
         if not is_valid_language(target_lang):
             logger.warning(f"Invalid language code: {target_lang}, using default")
-            return text
+            return text, True
         
         # Check in-memory cache first
         cache_key = f"{normalized_source}:{normalized_target}:{text}"
         cached = self._cache.get(cache_key)
         if cached is not None:
-            return cached
+            return cached, True
+        
+        # Concurrent requests for the same text (e.g. a popular product caption) share one lookup
+        return await run_once(
+            ("translate_text", normalized_source, normalized_target, text),
+            lambda: self._translate_uncached(text, normalized_source, normalized_target, cache_key)
+        )
+    
+    async def _translate_uncached(self, text: str, normalized_source: str, normalized_target: str, cache_key: str) -> Tuple[str, bool]:
+        """
+        Translate text that isn't in the in-memory cache, using the database cache
+        or the translation backend.
+        
+        Args:
+            text: Text to translate
+            normalized_source: Normalized source language code
+            normalized_target: Normalized target language code
+            cache_key: In-memory cache key for the result
         
+        Returns:
+            Tuple of (translated text, True), or (original text, False) if translation fails
+        """
         # Check database cache if available
         if self._db:
             try:
@@ -165,7 +205,7 @@ class TranslationService:
                 if db_cached:
                     # Also update in-memory cache
                     self._cache.set(cache_key, db_cached)
-                    return db_cached
+                    return db_cached, True
             except Exception as e:
                 logger.error(f"Error checking database translation cache: {e}")
         
@@ -195,10 +235,48 @@ class TranslationService:
                 except Exception as e:
                     logger.error(f"Error saving translation to database: {e}")
             
-            return translated
+            return translated, True
         except Exception as e:
             logger.error(f"Translation error ({normalized_source} -> {normalized_target}): {e}")
-            return text  # Return original text if translation fails
+            return text, False  # Return original text if translation fails
+    
+    async def _get_translated_template(self, key: str, lang: str) -> Tuple[str, bool]:
+        """
+        Get the string template for a key translated to a non-default language.
+        
+        Args:
+            key: String key from strings.py
+            lang: Target language code
+        
+        Returns:
+            Tuple of (translated template with placeholders intact, True), or
+            (English template, False) if translation fails
+        """
+        template_key = f"{lang}:{key}"
+        translated = self._template_cache.get(template_key)
+        if translated is not None:
+            return translated, True
+        
+        # Get base string template in English (without formatting)
+        base_string = get_base_string(key)
+        
+        # Translate the template (with placeholders intact); concurrent requests share one translation
+        translated, ok = await run_once(("translate", lang, key), lambda: self.translate_checked(base_string, lang))
+        
+        # Only remember successful translations, so failed ones are retried
+        if ok:
+            self._template_cache.set(template_key, translated)
+        return translated, ok
+    
+    @staticmethod
+    def _format(template: str, kwargs: Dict[str, Any]) -> str:
+        """Format a template, returning it as-is if formatting fails."""
+        if kwargs:
+            try:
+                return template.format(**kwargs)
+            except (KeyError, ValueError):
+                return template
+        return template
     
     async def get_string(self, key: str, lang: str = DEFAULT_LANGUAGE, **kwargs) -> str:
         """
@@ -216,24 +294,100 @@ class TranslationService:
         if lang == DEFAULT_LANGUAGE:
             return get_base_string(key, **kwargs)
         
-        # Get base string template in English (without formatting)
-        base_string = get_base_string(key)
+        text, _ = await self.get_string_checked(key, lang, **kwargs)
+        return text
+    
+    async def get_string_checked(self, key: str, lang: str = DEFAULT_LANGUAGE, **kwargs) -> Tuple[str, bool]:
+        """
+        Get a translated string by key, reporting whether translation failed.
+        
+        Args:
+            key: String key from strings.py
+            lang: Target language code
+            **kwargs: Format arguments for the string
         
-        # Translate the template (with placeholders intact)
-        translated = await self.translate(base_string, lang)
+        Returns:
+            Tuple of (translated and formatted string, translated) - translated is
+            False when the English string was used because translation failed
+        """
+        # If language is English or default, format and return without translation
+        if lang == DEFAULT_LANGUAGE:
+            return get_base_string(key, **kwargs), True
         
         # Format the translated string with actual values
-        if kwargs:
-            try:
-                return translated.format(**kwargs)
-            except (KeyError, ValueError):
-                # If formatting fails, return as-is
-                return translated
-        return translated
+        template, ok = await self._get_translated_template(key, lang)
+        return self._format(template, kwargs), ok
+    
+    async def get_strings(
+        self,
+        keys: List[str],
+        lang: str = DEFAULT_LANGUAGE,
+        format_kwargs: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> List[str]:
+        """
+        Get several translatable strings in one call.
+        
+        Args:
+            keys: String keys from strings.py
+            lang: Target language code
+            format_kwargs: Optional mapping of key -> format arguments for that string
+        
+        Returns:
+            Translated and formatted strings, in the same order as keys
+        """
+        strings, _ = await self.get_strings_checked(keys, lang, format_kwargs)
+        return strings
+    
+    async def get_strings_checked(
+        self,
+        keys: List[str],
+        lang: str = DEFAULT_LANGUAGE,
+        format_kwargs: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Tuple[List[str], bool]:
+        """
+        Get several translatable strings in one call, reporting whether any translation failed.
+        
+        Cached templates are looked up directly; only the missing ones are
+        translated, concurrently. A key whose translation fails falls back to
+        its English string without failing the rest of the batch.
+        
+        Args:
+            keys: String keys from strings.py
+            lang: Target language code
+            format_kwargs: Optional mapping of key -> format arguments for that string
+        
+        Returns:
+            Tuple of (translated and formatted strings in the same order as keys,
+            translated) - translated is False if any string fell back to English
+        """
+        format_kwargs = format_kwargs or {}
+        if lang == DEFAULT_LANGUAGE:
+            return [get_base_string(key, **format_kwargs.get(key, {})) for key in keys], True
+        
+        all_ok = True
+        templates = [self._template_cache.get(f"{lang}:{key}") for key in keys]
+        missing = [i for i, template in enumerate(templates) if template is None]
+        if missing:
+            translated = await asyncio.gather(
+                *(self._get_translated_template(keys[i], lang) for i in missing),
+                return_exceptions=True
+            )
+            for i, result in zip(missing, translated):
+                if isinstance(result, BaseException):
+                    if not isinstance(result, Exception):
+                        raise result
+                    logger.error(f"Translation error for '{keys[i]}' ({lang}): {result}")
+                    result = (get_base_string(keys[i]), False)
+                templates[i], ok = result
+                all_ok = all_ok and ok
+        
+        return [self._format(template, format_kwargs.get(key, {})) for key, template in zip(keys, templates)], all_ok
     
     def clear_cache(self):
         """Clear the translation cache."""
         self._cache.clear()
+        self._template_cache.clear()
+        _get_template.cache_clear()
 
 
 # Create singleton instance
@@ -255,10 +409,10 @@ async def get_translated_string_async(key: str, lang: str = DEFAULT_LANGUAGE, **
     return await translation_service.get_string(key, lang, **kwargs)
 
 
-def get_translated_string(key: str, lang: str = DEFAULT_LANGUAGE, **kwargs) -> str:
+async def get_translated_string_checked_async(key: str, lang: str = DEFAULT_LANGUAGE, **kwargs) -> Tuple[str, bool]:
     """
-    Synchronous wrapper for getting a translated string.
-    Performs actual translation if not in cache using synchronous GoogleTranslator.
+    Async function to get a translated string, reporting whether translation failed.
+    Use this to decide whether the result may be cached long-term.
     
     Args:
         key: String key from strings.py
@@ -266,64 +420,143 @@ def get_translated_string(key: str, lang: str = DEFAULT_LANGUAGE, **kwargs) -> s
         **kwargs: Format arguments for the string
     
     Returns:
-        Translated and formatted string
+        Tuple of (translated and formatted string, translated) - translated is
+        False when the English string was used because translation failed
+    """
+    return await translation_service.get_string_checked(key, lang, **kwargs)
+
+
+async def get_translated_strings_async(
+    keys: List[str],
+    lang: str = DEFAULT_LANGUAGE,
+    format_kwargs: Optional[Dict[str, Dict[str, Any]]] = None
+) -> List[str]:
+    """
+    Async function to get several translated strings at once.
+    Cached strings are resolved in one pass; missing ones are translated concurrently.
+    
+    Args:
+        keys: String keys from strings.py
+        lang: Target language code
+        format_kwargs: Optional mapping of key -> format arguments for that string
+    
+    Returns:
+        Translated and formatted strings, in the same order as keys
+    """
+    return await translation_service.get_strings(keys, lang, format_kwargs)
+
+
+async def get_translated_strings_checked_async(
+    keys: List[str],
+    lang: str = DEFAULT_LANGUAGE,
+    format_kwargs: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Tuple[List[str], bool]:
+    """
+    Async function to get several translated strings at once, reporting whether any translation failed.
+    
+    Args:
+        keys: String keys from strings.py
+        lang: Target language code
+        format_kwargs: Optional mapping of key -> format arguments for that string
+    
+    Returns:
+        Tuple of (translated and formatted strings in the same order as keys,
+        translated) - translated is False if any string fell back to English
+    """
+    return await translation_service.get_strings_checked(keys, lang, format_kwargs)
+
+
+@functools.lru_cache(maxsize=4096)
+def _get_template(key: str, lang: str) -> str:
+    """
+    Get the unformatted string template for a key in the target language.
+    Results are memoised per (key, lang); failed translations raise and are not cached.
+    
+    Args:
+        key: String key from strings.py
+        lang: Target language code
+    
+    Returns:
+        Translated template with placeholders intact
     """
-    # If language is English or default, format and return without translation
+    # Get base string template in English (without formatting)
+    base_string = get_base_string(key)
+    
+    # If language is English or default, return without translation
     if lang == DEFAULT_LANGUAGE:
-        return get_base_string(key, **kwargs)
+        return base_string
     
     # Normalize language codes
     normalized_target = normalize_language_code(lang)
     
-    # If normalized language is default, format and return without translation
+    # If normalized language is default, return without translation
     if normalized_target == DEFAULT_LANGUAGE:
-        return get_base_string(key, **kwargs)
+        return base_string
     
     # Validate normalized language code
     if not is_valid_language(normalized_target):
         logger.warning(f"Invalid language code: {normalized_target}, using default")
-        return get_base_string(key, **kwargs)
-    
-    # Get base string template in English (without formatting)
-    base_string = get_base_string(key)
+        return base_string
     
-    # Check cache first (cache key uses the template, not the formatted string)
+    # Check shared cache first (cache key uses the template, not the formatted string)
     cache_key = f"en:{normalized_target}:{base_string}"
     cached = translation_service._cache.get(cache_key)
-    
     if cached is not None:
-        # Format the cached translation with actual values
-        if kwargs:
-            try:
-                return cached.format(**kwargs)
-            except (KeyError, ValueError):
-                return cached
         return cached
     
     # If not in cache, perform translation synchronously
+    # Protect placeholders before translation
+    protected_text, placeholder_map = protect_placeholders(base_string)
+    
+    translator = GoogleTranslator(source="en", target=normalized_target)
+    translated = translator.translate(protected_text)
+    
+    # Restore placeholders after translation
+    translated = restore_placeholders(translated, placeholder_map)
+    
+    # Cache the result (cache the template, not the formatted string)
+    translation_service._cache.set(cache_key, translated)
+    return translated
+
+
+def get_translated_string(key: str, lang: str = DEFAULT_LANGUAGE, **kwargs) -> str:
+    """
+    Synchronous wrapper for getting a translated string.
+    Performs actual translation if not in cache using synchronous GoogleTranslator.
+    
+    Args:
+        key: String key from strings.py
+        lang: Target language code
+        **kwargs: Format arguments for the string
+    
+    Returns:
+        Translated and formatted string
+    """
+    text, _ = get_translated_string_checked(key, lang, **kwargs)
+    return text
+
+
+def get_translated_string_checked(key: str, lang: str = DEFAULT_LANGUAGE, **kwargs) -> Tuple[str, bool]:
+    """
+    Synchronous translated string lookup, reporting whether translation failed.
+    
+    Args:
+        key: String key from strings.py
+        lang: Target language code
+        **kwargs: Format arguments for the string
+    
+    Returns:
+        Tuple of (translated and formatted string, translated) - translated is
+        False when the English string was used because translation failed
+    """
     try:
-        # Protect placeholders before translation
-        protected_text, placeholder_map = protect_placeholders(base_string)
-        
-        translator = GoogleTranslator(source="en", target=normalized_target)
-        translated = translator.translate(protected_text)
-        
-        # Restore placeholders after translation
-        translated = restore_placeholders(translated, placeholder_map)
-        
-        # Cache the result (cache the template, not the formatted string)
-        translation_service._cache.set(cache_key, translated)
-        
-        # Format the translated string with actual values
-        if kwargs:
-            try:
-                return translated.format(**kwargs)
-            except (KeyError, ValueError):
-                return translated
-        return translated
+        template = _get_template(key, lang)
     except Exception as e:
-        logger.error(f"Translation error (en -> {normalized_target}): {e}")
-        return get_base_string(key, **kwargs)
+        logger.error(f"Translation error (en -> {lang}): {e}")
+        return get_base_string(key, **kwargs), False
+    
+    # Format the translated string with actual values
+    return TranslationService._format(template, kwargs), True
 
 
 async def translate_text_async(text: str, target_lang: str) -> str:
@@ -0,0 +1,27 @@
+"""
+Caption helpers shared by the database layer and the catalog keyboards.
+"""
+from typing import Optional
+
+
+BUTTON_TEXT_MAX_LENGTH = 50  # Longest caption shown on a product button
+
+
+def caption_button_text(caption: Optional[str]) -> Optional[str]:
+    """
+    Get the button label for a product caption.
+    The database stores this as short_caption when a product is added.
+    
+    Args:
+        caption: Product caption
+    
+    Returns:
+        Caption trimmed to BUTTON_TEXT_MAX_LENGTH chars, "No caption" for an empty
+        caption, or None for a blank caption (labelled by product ID instead)
+    """
+    caption = caption or "No caption"
+    if len(caption) > BUTTON_TEXT_MAX_LENGTH:
+        return caption[:BUTTON_TEXT_MAX_LENGTH - 3] + "..."
+    if not caption.strip():
+        return None
+    return caption
@@ -3,7 +3,7 @@ Category extraction and management utilities.
 """
 import re
 from typing import Tuple, Optional, List
-from translations.translator import get_translated_string
+from translations.translator import get_translated_string_checked
 
 # Define category structure
 CATEGORIES = {
@@ -130,6 +130,22 @@ def get_subcategory_display_name(subcategory: str, user_lang: str = "en") -> str
     
     Returns:
         Translated subcategory display name
+    """
+    display_name, _ = get_subcategory_display_name_checked(subcategory, user_lang)
+    return display_name
+
+
+def get_subcategory_display_name_checked(subcategory: str, user_lang: str = "en") -> Tuple[str, bool]:
+    """
+    Get translated display name for a subcategory, reporting whether translation failed.
+    
+    Args:
+        subcategory: The subcategory name (e.g., "AUTHENTICS", "HASH AND KIEF")
+        user_lang: User's language preference
+    
+    Returns:
+        Tuple of (translated subcategory display name, translated) - translated is
+        False when an English fallback was used because translation failed
     
     Note:
         Converts subcategory to key format by lowercasing and replacing all
@@ -142,13 +158,13 @@ def get_subcategory_display_name(subcategory: str, user_lang: str = "en") -> str
     key = f"subcategory_{normalized_subcategory}"
     
     # Get translated string
-    translated = get_translated_string(key, user_lang)
+    translated, ok = get_translated_string_checked(key, user_lang)
     
     # If translation not found, return title-cased version
     if translated == key:
-        return subcategory.title()
+        return subcategory.title(), ok
     
-    return translated
+    return translated, ok
 
 
 def format_category_info(category: Optional[str], subcategory: Optional[str], user_lang: str = "en") -> str:
@@ -163,14 +179,32 @@ def format_category_info(category: Optional[str], subcategory: Optional[str], us
     Returns:
         Formatted category info string
     """
+    info, _ = format_category_info_checked(category, subcategory, user_lang)
+    return info
+
+
+def format_category_info_checked(category: Optional[str], subcategory: Optional[str], user_lang: str = "en") -> Tuple[str, bool]:
+    """
+    Format category and subcategory for display, reporting whether translation failed.
+    
+    Args:
+        category: Category name
+        subcategory: Subcategory name
+        user_lang: User's language preference
+    
+    Returns:
+        Tuple of (formatted category info string, translated) - translated is
+        False when an English fallback was used because translation failed
+    """
     if not category:
         # Get translated "Uncategorized" string
-        uncategorized = get_translated_string("uncategorized", user_lang)
-        return uncategorized if uncategorized != "uncategorized" else "Uncategorized"
+        uncategorized, ok = get_translated_string_checked("uncategorized", user_lang)
+        return (uncategorized if uncategorized != "uncategorized" else "Uncategorized"), ok
     
+    # Category display names aren't translated
     display = get_category_display_name(category)
     if subcategory:
-        translated_subcat = get_subcategory_display_name(subcategory, user_lang)
-        display += f" • {translated_subcat}"
+        translated_subcat, ok = get_subcategory_display_name_checked(subcategory, user_lang)
+        return f"{display} • {translated_subcat}", ok
     
-    return display
+    return display, True
@@ -0,0 +1,81 @@
+"""
+Per-chat update ordering.
+Handlers registered with block=False run concurrently across chats; the
+dispatcher keeps updates from the same chat running one at a time, in the
+order they arrived, so a slow chat never holds up the others.
+"""
+import asyncio
+import functools
+from collections import OrderedDict
+from typing import Any, Coroutine
+from telegram import Update
+from telegram.ext import ContextTypes
+
+MAX_TRACKED_CHATS = 10000  # Idle chats beyond this are forgotten (least recently used first)
+
+
+class ChatDispatcher:
+    """Run coroutines one at a time per chat, first-in first-out."""
+
+    def __init__(self, max_chats: int = MAX_TRACKED_CHATS):
+        self.max_chats = max_chats
+        self._locks: "OrderedDict[int, asyncio.Lock]" = OrderedDict()
+
+    def _get_lock(self, chat_id: int) -> asyncio.Lock:
+        """Get (or create) the lock for a chat and mark it most recently used."""
+        lock = self._locks.get(chat_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[chat_id] = lock
+            self._evict_idle()
+        else:
+            self._locks.move_to_end(chat_id)
+        return lock
+
+    def _evict_idle(self):
+        """Drop least recently used idle chats while over max_chats."""
+        excess = len(self._locks) - self.max_chats
+        if excess <= 0:
+            return
+        for chat_id in [cid for cid, lock in self._locks.items() if not lock.locked()][:excess]:
+            del self._locks[chat_id]
+
+    async def submit(self, chat_id: int, coro: Coroutine[Any, Any, Any]) -> Any:
+        """
+        Run a coroutine once all earlier work for the same chat has finished.
+
+        Args:
+            chat_id: Chat the work belongs to
+            coro: Coroutine to run
+
+        Returns:
+            Result of the coroutine (exceptions propagate to the caller)
+        """
+        lock = self._get_lock(chat_id)
+        try:
+            await lock.acquire()
+        except BaseException:
+            # Cancelled while waiting - the coroutine will never run
+            coro.close()
+            raise
+        try:
+            return await coro
+        finally:
+            lock.release()
+
+
+chat_dispatcher = ChatDispatcher()
+
+
+def ordered_per_chat(handler):
+    """
+    Decorator serializing a handler per chat through chat_dispatcher.
+    Register the handler with block=False so other chats aren't held up.
+    """
+    @functools.wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
+        chat = update.effective_chat
+        if chat is None:
+            return await handler(update, context, *args, **kwargs)
+        return await chat_dispatcher.submit(chat.id, handler(update, context, *args, **kwargs))
+    return wrapper
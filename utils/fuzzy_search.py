@@ -1,7 +1,7 @@
 """
 Fuzzy search utilities for product search.
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 try:
     from rapidfuzz import process, fuzz
     RAPIDFUZZ_AVAILABLE = True
@@ -9,6 +9,20 @@ except ImportError:
     RAPIDFUZZ_AVAILABLE = False
     import difflib
 
+# Captions of the last product list searched (the list itself, its captions).
+# Searches run against the same cached catalog snapshot, so this is built once per snapshot.
+_captions_cache: Optional[Tuple[List[Dict[str, Any]], List[str]]] = None
+
+
+def _get_captions(products: List[Dict[str, Any]]) -> List[str]:
+    """Get the captions to score for a product list, reusing them for the same list."""
+    global _captions_cache
+    if _captions_cache is not None and _captions_cache[0] is products:
+        return _captions_cache[1]
+    captions = [p.get("caption", "") or "" for p in products]
+    _captions_cache = (products, captions)
+    return captions
+
 
 def fuzzy_search_products(
     products: List[Dict[str, Any]],
@@ -37,7 +51,7 @@ def fuzzy_search_products(
         # Use rapidfuzz for better performance
         results = process.extract(
             query_lower,
-            [p.get("caption", "") or "" for p in products],
+            _get_captions(products),
             scorer=fuzz.partial_ratio,
             limit=limit or len(products),
             score_cutoff=score_cutoff
@@ -3,6 +3,7 @@ Helper utilities for the bot.
 """
 import logging
 import json
+import functools
 from typing import List, Optional, Dict, Tuple
 from telegram import Update, User
 from telegram.ext import ContextTypes
@@ -25,6 +26,12 @@ ADMIN_COMMANDS_FALLBACK = (
     "• /nuke - Delete all products"
 )
 
+# Response for non-admins invoking an admin-only handler
+ADMIN_ONLY_MESSAGE = "❌ This command is only available for administrators."
+
+# Translation table escaping Markdown v1 special characters in one pass
+_MARKDOWN_V1_ESCAPES = str.maketrans({char: "\\" + char for char in "_*`["})
+
 
 def escape_markdown_v1(text: str) -> str:
     """
@@ -49,11 +56,7 @@ def escape_markdown_v1(text: str) -> str:
     # Escape special Markdown v1 characters
     # Note: We don't escape backslash itself as user names typically don't contain them,
     # and escaping backslash would require escaping it first to avoid double-escaping
-    text = text.replace('_', r'\_')
-    text = text.replace('*', r'\*')
-    text = text.replace('`', r'\`')
-    text = text.replace('[', r'\[')
-    return text
+    return text.translate(_MARKDOWN_V1_ESCAPES)
 
 
 def get_user_display_name(user: User, escaped: bool = True) -> str:
@@ -84,9 +87,45 @@ def get_admin_ids() -> List[int]:
     return Config.ADMIN_IDS
 
 
+# Admin IDs as a set for O(1) membership checks (configuration is loaded once at import)
+_ADMIN_ID_SET = frozenset(Config.ADMIN_IDS)
+
+
 def is_admin(user_id: int) -> bool:
     """Check if a user is an admin."""
-    return user_id in get_admin_ids()
+    return user_id in _ADMIN_ID_SET
+
+
+def admin_only(handler):
+    """
+    Decorator restricting a handler to administrators.
+    Non-admins get ADMIN_ONLY_MESSAGE as an alert (callback queries) or a reply (commands).
+    """
+    @functools.wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
+        if not is_admin(update.effective_user.id):
+            if update.callback_query:
+                await update.callback_query.answer(ADMIN_ONLY_MESSAGE, show_alert=True)
+            else:
+                await update.message.reply_text(ADMIN_ONLY_MESSAGE)
+            return
+        return await handler(update, context, *args, **kwargs)
+    return wrapper
+
+
+def parse_user_id(text: str) -> Optional[int]:
+    """
+    Parse a numeric Telegram user ID without raising.
+    
+    Args:
+        text: Raw user input (command argument or message text)
+    
+    Returns:
+        The user ID, or None if the text is not an integer
+    """
+    text = text.strip()
+    digits = text[1:] if text.startswith("-") else text
+    return int(text) if digits.isdecimal() else None
 
 
 def get_channel_id() -> Optional[int]:
@@ -246,8 +285,8 @@ async def get_bot_specific_file_id(
     Returns:
         Bot-specific file ID or None if forwarding fails
     """
-    from database import Database
-    db = Database()
+    from database import get_db
+    db = get_db()
     
     # Get current bot username
     bot_username = context.bot.username
@@ -421,8 +460,8 @@ async def get_bot_specific_file_id(
 
 async def clear_file_id_cache():
     """Clear the bot-specific file ID cache (useful for forcing refresh of old entries)."""
-    from database import Database
-    db = Database()
+    from database import get_db
+    db = get_db()
     deleted = await db.clear_bot_file_id_cache()
     logger.info(f"File ID cache cleared: {deleted} entries removed from database")
     return deleted
@@ -430,8 +469,8 @@ async def clear_file_id_cache():
 
 async def get_file_id_cache_size() -> int:
     """Get the current size of the file ID cache."""
-    from database import Database
-    db = Database()
+    from database import get_db
+    db = get_db()
     async with db.get_connection() as conn:
         async with conn.execute("SELECT COUNT(*) FROM bot_file_id_cache") as cursor:
             row = await cursor.fetchone()
@@ -11,13 +11,14 @@ from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, Application
 from telegram.error import TelegramError, Forbidden, BadRequest
 
-from database import Database
-from utils.categories import get_category_display_name, get_subcategory_display_name, NOTIFICATION_EXCLUDED_CATEGORIES
+from database import Database, get_db
+from utils.categories import get_all_categories, get_category_display_name, get_subcategory_display_name, NOTIFICATION_EXCLUDED_CATEGORIES
 from utils.helpers import get_admin_ids, get_bot_specific_file_id
 from translations.translator import translate_text_async
 from configs.config import Config
 
 logger = logging.getLogger(__name__)
+db = get_db()
 
 # Rate limiting configuration
 MAX_NOTIFICATIONS_PER_HOUR = 5  # Maximum notifications per user per hour
@@ -36,6 +37,7 @@ STAGGER_INTERVAL_SECONDS = 10  # Delay in seconds between groups (reduced from 3
 MAX_CUSTOM_MESSAGES_PER_HOUR = 3  # Maximum custom messages per user per hour
 CUSTOM_MESSAGE_BATCH_SIZE = 5  # Send custom messages in smaller batches
 CUSTOM_MESSAGE_DELAY_SECONDS = 5  # Longer delay for custom messages
+BROADCAST_USER_BATCH_SIZE = 500  # Users read from the database per batch when queuing a broadcast
 
 # Queue processing safety limits
 MAX_QUEUE_PROCESSING_ITERATIONS = 50  # Maximum iterations to prevent infinite loops (50 batches * 100 = 5000 messages max per run)
@@ -101,6 +103,110 @@ def get_bot_by_username(username: str) -> Optional[Application]:
     return None
 
 
+def is_primary_instance(context: ContextTypes.DEFAULT_TYPE) -> bool:
+    """
+    Check if this is the primary bot instance.
+    Only the primary bot (first token in BOT_TOKENS) should create notification queues.
+    
+    Args:
+        context: Telegram context with bot information
+        
+    Returns:
+        True if this is the primary instance, False otherwise
+    """
+    if not hasattr(context, 'bot') or not hasattr(context.bot, 'token'):
+        # If we can't determine, assume it's primary to maintain backward compatibility
+        logger.warning("Unable to determine bot instance, assuming primary")
+        return True
+    
+    current_token = context.bot.token
+    bot_tokens = Config.BOT_TOKENS
+    
+    # Validate BOT_TOKENS is a non-empty list
+    if not bot_tokens or not isinstance(bot_tokens, list) or len(bot_tokens) == 0:
+        # No tokens configured or invalid configuration, assume primary
+        return True
+    
+    # Primary bot is the first token in the list (index 0)
+    is_primary = current_token == bot_tokens[0]
+    
+    if not is_primary:
+        logger.debug(f"Skipping operation - not primary instance (bot token: ...{current_token[-5:]})")
+    
+    return is_primary
+
+
+async def notify_admins_for_categorization(context: ContextTypes.DEFAULT_TYPE, product_id: int):
+    """Send categorization request to all admins for a new product.
+    Only runs on the primary bot instance to avoid duplicate notifications.
+    """
+    # Check if this is the primary bot instance
+    if not is_primary_instance(context):
+        logger.info(f"Skipping categorization notification for product {product_id} - not primary instance")
+        return
+    
+    try:
+        product = await db.get_product(product_id)
+        if not product:
+            return
+        
+        # Get all admin IDs
+        admin_ids = get_admin_ids()
+        
+        if not admin_ids:
+            logger.warning("No admin IDs configured. Product will remain uncategorized.")
+            return
+        
+        # Create category selection keyboard
+        keyboard_buttons = []
+        
+        for category in get_all_categories():
+            display_name = get_category_display_name(category)
+            keyboard_buttons.append([
+                InlineKeyboardButton(display_name, callback_data=f"setcat|{product_id}|{category}")
+            ])
+        
+        keyboard = InlineKeyboardMarkup(keyboard_buttons)
+        
+        # Prepare notification message
+        caption = product.get("caption", "No caption")
+        caption_preview = caption[:100] + "..." if len(caption) > 100 else caption
+        
+        message_text = (
+            f"🆕 **New Product Added - Needs Categorization**\n\n"
+            f"📝 Caption: {caption_preview}\n"
+            f"🆔 Product ID: {product_id}\n\n"
+            f"Please select a category:"
+        )
+        
+        # Get primary admin ID (use PRIMARY_ADMIN_ID if configured, otherwise use first admin)
+        primary_admin = Config.PRIMARY_ADMIN_ID or (admin_ids[0] if admin_ids else None)
+
+        if not primary_admin:
+            logger.warning("No primary admin configured. Product will remain uncategorized.")
+            return
+
+        # Send notification only to primary admin
+        try:
+            await context.bot.send_message(
+                chat_id=primary_admin,
+                text=message_text,
+                parse_mode="Markdown",
+                reply_markup=keyboard
+            )
+            
+            logger.info(f"Sent categorization request to primary admin {primary_admin} for product {product_id}")
+            
+        except Exception as e:
+            logger.error(f"Failed to notify primary admin {primary_admin}: {e}")
+        
+        # Mark as pending categorization
+        await db.add_pending_categorization(product_id)
+        
+    except Exception as e:
+        logger.error(f"Error notifying admins for categorization: {e}")
+
+
 class NotificationService:
     """Service for managing and sending product notifications."""
     
@@ -198,33 +304,8 @@ class NotificationService:
         """
         Check if this is the primary bot instance.
         Only the primary bot (first token in BOT_TOKENS) should create notification queues.
-        
-        Args:
-            context: Telegram context with bot information
-            
-        Returns:
-            True if this is the primary instance, False otherwise
         """
-        if not hasattr(context, 'bot') or not hasattr(context.bot, 'token'):
-            # If we can't determine, assume it's primary to maintain backward compatibility
-            logger.warning("Unable to determine bot instance, assuming primary")
-            return True
-        
-        current_token = context.bot.token
-        bot_tokens = Config.BOT_TOKENS
-        
-        # Validate BOT_TOKENS is a non-empty list
-        if not bot_tokens or not isinstance(bot_tokens, list) or len(bot_tokens) == 0:
-            # No tokens configured or invalid configuration, assume primary
-            return True
-        
-        # Primary bot is the first token in the list (index 0)
-        is_primary = current_token == bot_tokens[0]
-        
-        if not is_primary:
-            logger.debug(f"Skipping operation - not primary instance (bot token: ...{current_token[-5:]})")
-        
-        return is_primary
+        return is_primary_instance(context)
     
     async def notify_users_about_product(
         self,
@@ -852,36 +933,36 @@ class NotificationService:
             return {"queued": 0, "sent": 0, "failed": 0}
         
         try:
-            # Get all users
-            all_users = await self.db.get_all_users()
-            
-            if not all_users:
-                logger.debug("No users to broadcast to")
-                return {"queued": 0, "sent": 0, "failed": 0}
+            logger.info("Broadcasting custom message to all users")
             
-            logger.info(f"Broadcasting custom message to {len(all_users)} users")
-            
-            # Queue messages for all non-blocked users
+            # Stream users from the database in batches and queue messages
+            # for all non-blocked, non-admin users
+            admin_ids = set(get_admin_ids())
             queued = 0
             skipped_blocked = 0
             skipped_admin = 0
             
-            for user in all_users:
-                user_id = user["user_id"]
-                
-                # Skip blocked users if requested
-                if exclude_blocked and user.get("is_blocked", 0) == 1:
-                    skipped_blocked += 1
-                    continue
-                
-                # Skip admin users
-                from utils.helpers import get_admin_ids
-                if user_id in get_admin_ids():
-                    skipped_admin += 1
-                    continue
+            async for batch in self.db.iter_user_batches(BROADCAST_USER_BATCH_SIZE):
+                recipients = []
+                for user_id, is_blocked in batch:
+                    # Skip blocked users if requested
+                    if exclude_blocked and is_blocked == 1:
+                        skipped_blocked += 1
+                        continue
+                    
+                    # Skip admin users
+                    if user_id in admin_ids:
+                        skipped_admin += 1
+                        continue
+                    
+                    recipients.append(user_id)
                 
-                await self.db.queue_custom_message(user_id, message_text)
-                queued += 1
+                await self.db.queue_custom_messages(recipients, message_text)
+                queued += len(recipients)
+            
+            if queued == 0 and skipped_blocked == 0 and skipped_admin == 0:
+                logger.debug("No users to broadcast to")
+                return {"queued": 0, "sent": 0, "failed": 0}
             
             logger.info(f"Queued {queued} custom messages (skipped {skipped_blocked} blocked, {skipped_admin} admins)")
             
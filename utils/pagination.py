@@ -1,9 +1,44 @@
 """
 Pagination utilities for catalog display.
 """
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
+from utils.captions import caption_button_text
+
+
+def product_button_text(product: Dict[str, Any]) -> str:
+    """
+    Get the label for a product button, preferring the precomputed short_caption.
+    
+    Args:
+        product: Product dictionary
+    
+    Returns:
+        Caption trimmed to BUTTON_TEXT_MAX_LENGTH chars, or a fallback label
+    """
+    return (
+        product.get("short_caption")
+        or caption_button_text(product.get("caption"))
+        or f"Product #{product['id']}"
+    )
+
+
+def create_product_buttons(products: List[Dict[str, Any]]) -> List[List[InlineKeyboardButton]]:
+    """
+    Create one keyboard row per product linking to its product view.
+    
+    Args:
+        products: List of product dictionaries
+    
+    Returns:
+        List of keyboard rows
+    """
+    return [
+        [InlineKeyboardButton(product_button_text(product), callback_data=f"product|{product['id']}")]
+        for product in products
+    ]
+
 
 def create_pagination_keyboard(
     products: List[Dict[str, Any]],
@@ -25,18 +60,8 @@ def create_pagination_keyboard(
     Returns:
         InlineKeyboardMarkup with product buttons and pagination controls
     """
-    keyboard = []
-    
     # Add product buttons (max 5 per page)
-    for product in products:
-        caption = product.get("caption", "No caption") or "No caption"
-        # Trim caption to 50 chars max
-        button_text = caption[:47] + "..." if len(caption) > 50 else caption
-        if not button_text.strip():
-            button_text = f"Product #{product['id']}"
-        
-        callback_data = f"product|{product['id']}"
-        keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
+    keyboard = create_product_buttons(products)
     
     # Add pagination controls if more than 5 products
     if total_pages > 1:
@@ -66,6 +91,22 @@ def create_pagination_keyboard(
     return InlineKeyboardMarkup(keyboard)
 
 
+def clamp_page(total_items: int, page: int, per_page: int = 5) -> Tuple[int, int]:
+    """
+    Clamp a page number to the valid range for a number of items.
+    
+    Args:
+        total_items: Total number of items
+        page: Requested page number (1-indexed)
+        per_page: Number of items per page
+    
+    Returns:
+        Tuple of (page, total_pages)
+    """
+    total_pages = (total_items + per_page - 1) // per_page if total_items else 1
+    return max(1, min(page, total_pages)), total_pages
+
+
 def paginate_items(items: List[Any], page: int, per_page: int = 5) -> Tuple[List[Any], int]:
     """
     Paginate a list of items.
@@ -78,8 +119,7 @@ def paginate_items(items: List[Any], page: int, per_page: int = 5) -> Tuple[List
     Returns:
         Tuple of (items_for_page, total_pages)
     """
-    total_pages = (len(items) + per_page - 1) // per_page if items else 1
-    page = max(1, min(page, total_pages))
+    page, total_pages = clamp_page(len(items), page, per_page)
     
     start_idx = (page - 1) * per_page
     end_idx = start_idx + per_page
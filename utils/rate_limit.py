@@ -0,0 +1,52 @@
+"""
+Per-user rate limiting for button presses.
+"""
+import time
+from typing import Dict, Tuple
+
+MAX_TRACKED_USERS = 10000  # Prune refilled buckets once this many users are tracked
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter keyed by user ID.
+
+    Each user may make `capacity` requests in a burst, refilled at `rate`
+    tokens per second.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets: Dict[int, Tuple[float, float]] = {}  # user_id -> (tokens, last_ts)
+
+    def allow(self, user_id: int) -> bool:
+        """
+        Consume one token for a user if available.
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            True if the request is allowed, False if the user is over the limit
+        """
+        now = time.monotonic()
+        tokens, last_ts = self._buckets.get(user_id, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - last_ts) * self.rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[user_id] = (tokens, now)
+
+        if len(self._buckets) > MAX_TRACKED_USERS:
+            self._prune(now)
+        return allowed
+
+    def _prune(self, now: float):
+        """Forget users whose bucket has refilled completely (same as a new user)."""
+        full_after = self.capacity / self.rate
+        self._buckets = {
+            uid: (tokens, ts) for uid, (tokens, ts) in self._buckets.items()
+            if now - ts < full_after
+        }
@@ -0,0 +1,90 @@
+"""
+Helpers for answering callback queries and commands with a text message.
+"""
+from typing import Optional
+from telegram import Update, Message, InlineKeyboardMarkup
+from telegram.ext import ContextTypes
+
+
+# Characters that have a meaning in Telegram's legacy Markdown
+_MARKDOWN_V1_CHARS = "*_`["
+
+
+def markdown_parse_mode(text: str) -> Optional[str]:
+    """
+    Get the parse mode for text meant as Markdown.
+
+    Text without any Markdown characters renders the same as plain text,
+    so Telegram doesn't need to parse it.
+
+    Args:
+        text: Message text
+
+    Returns:
+        "Markdown" if the text contains Markdown characters, otherwise None
+    """
+    return "Markdown" if any(char in text for char in _MARKDOWN_V1_CHARS) else None
+
+
+def is_media_message(message: Message) -> bool:
+    """
+    Check whether a message is a media message (photo, video, document, animation or audio).
+
+    The text of such messages can't be edited with edit_message_text.
+    Other attachments (stickers, locations, polls, ...) don't count as media here.
+
+    Args:
+        message: Telegram message
+
+    Returns:
+        True if the message has one of the five media types, False otherwise
+    """
+    return bool(message.photo or message.video or message.document or message.animation or message.audio)
+
+
+async def reply_or_edit(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    text: str,
+    reply_markup: Optional[InlineKeyboardMarkup] = None,
+    parse_mode: Optional[str] = "Markdown"
+) -> None:
+    """
+    Show text to the user, editing the current message where possible.
+
+    - Callback on a media message: send a new message (keeps the product view)
+    - Callback on a text message: edit it in place
+    - Command/text message: reply to it
+
+    Args:
+        update: Telegram update
+        context: Callback context
+        text: Message text
+        reply_markup: Optional inline keyboard
+        parse_mode: Parse mode for the text (default Markdown, skipped for text without Markdown)
+    """
+    if parse_mode == "Markdown":
+        parse_mode = markdown_parse_mode(text)
+
+    if update.callback_query:
+        if is_media_message(update.callback_query.message):
+            # Don't delete media message - send new message to preserve product view
+            await context.bot.send_message(
+                chat_id=update.effective_chat.id,
+                text=text,
+                reply_markup=reply_markup,
+                parse_mode=parse_mode
+            )
+        else:
+            # Regular text message, can be edited
+            await update.callback_query.edit_message_text(
+                text,
+                reply_markup=reply_markup,
+                parse_mode=parse_mode
+            )
+    else:
+        await update.message.reply_text(
+            text,
+            reply_markup=reply_markup,
+            parse_mode=parse_mode
+        )
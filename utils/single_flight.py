@@ -0,0 +1,49 @@
+"""
+Single-flight request coalescing.
+Concurrent callers asking for the same key share one in-flight coroutine
+instead of each running their own identical query.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+# Pending results keyed by request key
+_in_flight: Dict[Hashable, asyncio.Future] = {}
+
+
+async def run_once(key: Hashable, coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run coro_factory() once for all concurrent callers with the same key.
+
+    The first caller runs the coroutine; callers arriving while it is still
+    running await the same result (or exception). Nothing is cached after
+    the coroutine finishes.
+
+    Args:
+        key: Hashable identifier for the request (e.g. ("category_counts", db_path))
+        coro_factory: Zero-argument callable returning the awaitable to run
+
+    Returns:
+        Result of the coroutine
+    """
+    future = _in_flight.get(key)
+    if future is not None:
+        # Shield so a cancelled waiter doesn't cancel the shared result
+        return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    try:
+        result = await coro_factory()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark as retrieved so an unawaited future doesn't log "exception never retrieved"
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _in_flight.pop(key, None)
@@ -16,6 +16,7 @@ from configs.config import Config, ConfigError
 # Import the bot setup functions
 from main import (
     post_init,
+    post_shutdown,
     setup_bot_commands,
     start_command,
     menu_command,
@@ -103,8 +104,9 @@ async def setup_application(bot_token: str, bot_index: int = 0):
     
     # Register handlers
     bot_app.add_handler(CommandHandler("start", start_command))
-    bot_app.add_handler(CommandHandler("menu", menu_command))
-    bot_app.add_handler(CommandHandler("language", language_command))
+    # Non-blocking handlers run concurrently across chats (ordered per chat by ordered_per_chat)
+    bot_app.add_handler(CommandHandler("menu", menu_command, block=False))
+    bot_app.add_handler(CommandHandler("language", language_command, block=False))
     bot_app.add_handler(CommandHandler("nuke", nuke_command))
     bot_app.add_handler(CommandHandler("recategorize", recategorize_command))
     bot_app.add_handler(CommandHandler("users", users_command))
@@ -147,13 +149,14 @@ async def setup_application(bot_token: str, bot_index: int = 0):
         logger.info(f"Channel monitoring DISABLED for secondary bot {bot_index} (only primary bot monitors channel)")
     
     # Callback query handler (for inline buttons)
-    bot_app.add_handler(CallbackQueryHandler(callback_query_handler))
+    bot_app.add_handler(CallbackQueryHandler(callback_query_handler, block=False))
     
     # Message handler (for search queries)
     bot_app.add_handler(
         MessageHandler(
             filters.TEXT & ~filters.COMMAND & filters.ChatType.PRIVATE,
-            message_handler
+            message_handler,
+            block=False
         )
     )
     
@@ -270,6 +273,9 @@ async def lifespan(app: FastAPI):
     # Clear global registry
     _bot_applications.clear()
     logger.info("All bot applications shut down successfully")
+    
+    # Flush buffered pagination states and release pooled database connections
+    await post_shutdown(None)
 
 
 # Create FastAPI app with lifespan